@@ -1,13 +1,22 @@
+import sys
 import datetime
 import os.path
-import json
 from pathlib import Path
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
 from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
 from google.auth.transport.requests import Request
 import requests
 
+from schedule_template import (
+    TIMEZONE,
+    Recurrence,
+    TemplateError,
+    TemplateEvent,
+    load_template,
+)
+
 # Scope requis pour lire/écrire dans l'agenda
 SCOPES = ["https://www.googleapis.com/auth/calendar.events"]
 SECRETS_FILE = Path("google_calendar", "client_secret_.json")
@@ -65,6 +74,7 @@ def recurring_event(
     location="",
     count=None,
     until=None,
+    service=None,
 ):
     """
     Add a recurring event to Google Calendar
@@ -79,22 +89,14 @@ def recurring_event(
         location: Event location
         count: Number of occurrences (optional)
         until: End date of recurrence in ISO 8601 format (optional)
+        service: Calendar service to reuse (optional)
     """
-    service = get_calendar_service()
+    service = service or get_calendar_service()
     start_time = datetime.datetime.fromisoformat(start_time_str)
     end_time = start_time + datetime.timedelta(minutes=duration_minutes)
 
-    # Handle recurrence with or without BYDAY parameter
-    if "BYDAY" in recurrence:
-        recurrence_rule = f"RRULE:FREQ={recurrence}"
-    else:
-        recurrence_rule = f"RRULE:FREQ={recurrence}"
-        if count:
-            recurrence_rule += f";COUNT={count}"
-        if until:
-            # Format until date as YYYYMMDD for RRULE
-            until_formatted = until.replace("-", "").split("T")[0]
-            recurrence_rule += f";UNTIL={until_formatted}"
+    # count and until apply with or without a BYDAY parameter
+    recurrence_rule = Recurrence.parse(recurrence, count, until).to_rrule()
 
     event = {
         "summary": summary,
@@ -116,29 +118,53 @@ def recurring_event(
     print(f"✅ Événement récurrent créé : {event.get('htmlLink')}")
 
 
-def load_sample_events():
-    """Load sample events from the JSON file and add them as recurring weekly events"""
+def insert_template_event(service, event: TemplateEvent):
+    """Insert one validated template event, recurring if it has a rule"""
+    end = event.start + datetime.timedelta(minutes=event.duration_minutes)
+    body = {
+        "summary": event.summary,
+        "location": event.location,
+        "description": event.description,
+        "start": {"dateTime": event.start.isoformat(), "timeZone": TIMEZONE},
+        "end": {"dateTime": end.isoformat(), "timeZone": TIMEZONE},
+        "visibility": "private",  # Make events private
+    }
+    if event.rrule:
+        body["recurrence"] = [event.rrule]
+    return service.events().insert(calendarId="primary", body=body).execute()
+
+
+def load_sample_events(events_file=SAMPLE_EVENTS_FILE):
+    """Validate the whole template first, then add its events to Google Calendar"""
     try:
-        with open(SAMPLE_EVENTS_FILE, "r", encoding="utf-8") as file:
-            events = json.load(file)
-
-        print(
-            f"Chargement de {len(events)} événements récurrents depuis {SAMPLE_EVENTS_FILE}"
-        )
-        for event in events:
-            recurring_event(
-                summary=event["summary"],
-                start_time_str=event["start_time_str"],
-                duration_minutes=event["duration_minutes"],
-                recurrence=event.get("recurrence", "WEEKLY"),
-                description=event.get("description", ""),
-                location=event.get("location", ""),
-            )
-        print("✅ Tous les événements récurrents ont été ajoutés avec succès!")
-    except Exception as e:
+        template = load_template(events_file)
+    except (OSError, TemplateError) as e:
         print(f"❌ Erreur lors du chargement des événements: {e}")
+        return
 
+    count = len(template.events)
+    print(f"Chargement de {count} événements récurrents depuis {events_file}")
+    service = get_calendar_service()
+    failed = 0
+    for event in template.events:
+        try:
+            created = insert_template_event(service, event)
+        except HttpError as e:
+            failed += 1
+            print(f"❌ {event.summary}: {e}")
+            continue
+        print(f"✅ Événement créé : {created.get('htmlLink')}")
+    if failed:
+        print(f"❌ {failed} événement(s) non ajouté(s)")
+    else:
+        print("✅ Tous les événements récurrents ont été ajoutés avec succès!")
 
-if __name__ == "__main__":
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
     # Chargement des événements depuis le fichier JSON en tant qu'événements récurrents
-    load_sample_events()
+    load_sample_events(argv[0] if argv else SAMPLE_EVENTS_FILE)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,430 @@
+#!/usr/bin/env python3
+"""Validate and compile schedule templates such as sample_events.json.
+
+A template is a JSON list of events:
+    {"summary": "...", "start_time_str": "2025-05-05T09:00:00",
+     "duration_minutes": 210, "recurrence": "WEEKLY;BYDAY=MO,TU,WE,TH,FR",
+     "count": 10, "until": "2025-12-31", "description": "...", "location": "..."}
+Events without a recurrence repeat weekly; "recurrence": null makes a one-off.
+Every event is checked before anything is used, and all errors are reported
+at once. Recurrences (DAILY, WEEKLY, MONTHLY with INTERVAL, BYDAY, COUNT and
+UNTIL) are expanded locally, so occurrences of any date window are known
+without asking Google. The compiled form is cached by file hash.
+"""
+
+import os
+import json
+import hashlib
+import argparse
+import datetime
+from datetime import timedelta
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Iterator
+from zoneinfo import ZoneInfo
+
+TIMEZONE = "Europe/Paris"
+DEFAULT_CACHE_DIR = Path.home() / ".cache" / "toolbox" / "schedule_templates"
+# Bumped whenever compiled templates change meaning, so stale caches are rebuilt
+COMPILER_VERSION = 2
+
+FREQUENCIES = ("DAILY", "WEEKLY", "MONTHLY")
+WEEKDAYS = ("MO", "TU", "WE", "TH", "FR", "SA", "SU")
+EVENT_KEYS = {
+    "summary",
+    "start_time_str",
+    "duration_minutes",
+    "recurrence",
+    "count",
+    "until",
+    "description",
+    "location",
+}
+
+
+class TemplateError(ValueError):
+    """Every problem found in a template, one per line."""
+
+    def __init__(self, path: Path, errors: list[str]) -> None:
+        self.errors = errors
+        super().__init__(f"{path}: {len(errors)} error(s)\n" + "\n".join(errors))
+
+
+@dataclass(frozen=True)
+class Recurrence:
+    freq: str = "WEEKLY"
+    interval: int = 1
+    byday: tuple[int, ...] = ()  # weekday numbers, Monday = 0
+    count: int | None = None
+    until: datetime.datetime | None = None  # local time, inclusive
+
+    @classmethod
+    def parse(cls, rule: str, count: Any = None, until: Any = None) -> "Recurrence":
+        """'WEEKLY;BYDAY=MO,FR' or 'RRULE:FREQ=WEEKLY;...', plus count/until fields.
+
+        count and until apply whether or not the rule has a BYDAY part.
+        """
+        rule = rule.strip().removeprefix("RRULE:")
+        if rule and "=" not in rule.split(";", 1)[0]:
+            rule = f"FREQ={rule}"
+        parts: dict[str, str] = {}
+        for part in filter(None, rule.split(";")):
+            key, sep, value = part.partition("=")
+            if not sep or key.upper() in parts:
+                raise ValueError(f"malformed recurrence part '{part}'")
+            parts[key.upper()] = value.strip()
+
+        unsupported = set(parts) - {"FREQ", "INTERVAL", "BYDAY", "COUNT", "UNTIL"}
+        if unsupported:
+            raise ValueError(f"unsupported recurrence parts {sorted(unsupported)}")
+        freq = parts.get("FREQ", "WEEKLY").upper()
+        if freq not in FREQUENCIES:
+            raise ValueError(f"FREQ must be one of {', '.join(FREQUENCIES)}")
+        interval = _positive_int(parts.get("INTERVAL", 1), "INTERVAL")
+        byday = []
+        for day in filter(None, parts.get("BYDAY", "").upper().split(",")):
+            if day not in WEEKDAYS:
+                raise ValueError(f"BYDAY '{day}' is not one of {','.join(WEEKDAYS)}")
+            byday.append(WEEKDAYS.index(day))
+        if byday and freq == "MONTHLY":
+            raise ValueError("BYDAY is not supported with FREQ=MONTHLY")
+
+        if "COUNT" in parts:
+            if count is not None:
+                raise ValueError("count given both in the rule and as a field")
+            count = parts["COUNT"]
+        if "UNTIL" in parts:
+            if until is not None:
+                raise ValueError("until given both in the rule and as a field")
+            until = parts["UNTIL"]
+        if count is not None and until is not None:
+            raise ValueError("count and until cannot both be set")
+        return cls(
+            freq=freq,
+            interval=interval,
+            byday=tuple(sorted(set(byday))),
+            count=None if count is None else _positive_int(count, "count"),
+            until=None if until is None else _parse_until(until),
+        )
+
+    def to_rrule(self) -> str:
+        rule = f"RRULE:FREQ={self.freq}"
+        if self.interval != 1:
+            rule += f";INTERVAL={self.interval}"
+        if self.byday:
+            rule += ";BYDAY=" + ",".join(WEEKDAYS[day] for day in self.byday)
+        if self.count is not None:
+            rule += f";COUNT={self.count}"
+        if self.until is not None:
+            # UNTIL must be in UTC when DTSTART has a time zone (RFC 5545)
+            until = self.until.replace(tzinfo=ZoneInfo(TIMEZONE))
+            until = until.astimezone(datetime.timezone.utc)
+            rule += f";UNTIL={until.strftime('%Y%m%dT%H%M%SZ')}"
+        return rule
+
+    def dates(
+        self, start: datetime.date, first: datetime.date, last: datetime.date
+    ) -> Iterator[datetime.date]:
+        """Occurrence dates from start (DTSTART) in order, up to last included.
+
+        Without COUNT nothing before first needs counting, so whole periods
+        are skipped and far windows cost no more than near ones.
+        """
+        if self.freq == "MONTHLY":
+            months = 0
+            while True:
+                year, month = divmod(start.month - 1 + months, 12)
+                if datetime.date(start.year + year, month + 1, 1) > last:
+                    return
+                try:
+                    # Months without that day are skipped, as in RFC 5545
+                    yield datetime.date(start.year + year, month + 1, start.day)
+                except ValueError:
+                    pass
+                months += self.interval
+
+        step = timedelta(days=self.interval * (1 if self.freq == "DAILY" else 7))
+        if self.freq == "DAILY":
+            period, days = start, [0]
+        else:
+            period = start - timedelta(days=start.weekday())
+            days = list(self.byday) or [start.weekday()]
+        if self.count is None and first > period:
+            period += (first - period) // step * step
+        while period <= last:
+            for offset in days:
+                day = period + timedelta(days=offset)
+                if not start <= day <= last:
+                    continue
+                # With FREQ=DAILY, BYDAY filters the days instead of adding some
+                if self.freq == "DAILY" and self.byday:
+                    if day.weekday() not in self.byday:
+                        continue
+                yield day
+            period += step
+
+
+@dataclass(frozen=True)
+class TemplateEvent:
+    summary: str
+    start: datetime.datetime  # local time of the first occurrence, naive
+    duration_minutes: int
+    recurrence: Recurrence | None
+    description: str = ""
+    location: str = ""
+
+    @property
+    def rrule(self) -> str | None:
+        return self.recurrence.to_rrule() if self.recurrence else None
+
+
+@dataclass(frozen=True)
+class Occurrence:
+    summary: str
+    start: datetime.datetime
+    end: datetime.datetime
+    description: str
+    location: str
+
+
+class ScheduleTemplate:
+    def __init__(self, events: list[TemplateEvent]) -> None:
+        self.events = events
+
+    def occurrences(
+        self, first: datetime.date, last: datetime.date
+    ) -> list[Occurrence]:
+        """Concrete occurrences starting between first and last included."""
+        tz = ZoneInfo(TIMEZONE)
+        found = []
+        for event in self.events:
+            start_day = event.start.date()
+            rule = event.recurrence
+            days = rule.dates(start_day, first, last) if rule else iter([start_day])
+            for index, day in enumerate(days, start=1):
+                local_start = datetime.datetime.combine(day, event.start.time())
+                if rule and rule.count is not None and index > rule.count:
+                    break
+                if rule and rule.until is not None and local_start > rule.until:
+                    break
+                if not first <= day <= last:
+                    continue
+                start = local_start.replace(tzinfo=tz)
+                found.append(
+                    Occurrence(
+                        summary=event.summary,
+                        start=start,
+                        end=start + timedelta(minutes=event.duration_minutes),
+                        description=event.description,
+                        location=event.location,
+                    )
+                )
+        found.sort(key=lambda occurrence: (occurrence.start, occurrence.summary))
+        return found
+
+
+def _positive_int(value: Any, name: str) -> int:
+    if isinstance(value, str) and value.isdigit():
+        value = int(value)
+    if not isinstance(value, int) or isinstance(value, bool) or value < 1:
+        raise ValueError(f"{name} must be a positive integer, got {value!r}")
+    return value
+
+
+def _parse_until(value: Any) -> datetime.datetime:
+    """A date (the whole day is included), a local datetime or an RRULE UNTIL."""
+    if not isinstance(value, str):
+        raise ValueError(f"until must be a date string, got {value!r}")
+    text = value.strip()
+    if len(text) == 8 and text.isdigit():
+        text = f"{text[:4]}-{text[4:6]}-{text[6:]}"
+    elif len(text) >= 15 and text[8] == "T" and text[:8].isdigit():
+        date_part, time_part = text[:8], text[9:]
+        text = (
+            f"{date_part[:4]}-{date_part[4:6]}-{date_part[6:]}"
+            f"T{time_part[:2]}:{time_part[2:4]}:{time_part[4:]}"
+        )
+    try:
+        if len(text) == 10:
+            return datetime.datetime.combine(
+                datetime.date.fromisoformat(text), datetime.time(23, 59, 59)
+            )
+        until = datetime.datetime.fromisoformat(text.replace("Z", "+00:00"))
+    except ValueError:
+        raise ValueError(f"until '{value}' is not a date") from None
+    return _to_local(until)
+
+
+def _to_local(value: datetime.datetime) -> datetime.datetime:
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(ZoneInfo(TIMEZONE)).replace(tzinfo=None)
+
+
+def _validate_event(data: Any) -> TemplateEvent:
+    if not isinstance(data, dict):
+        raise ValueError("an event must be an object")
+    unknown = set(data) - EVENT_KEYS
+    if unknown:
+        raise ValueError(f"unknown fields {sorted(unknown)}")
+    summary = data.get("summary")
+    if not isinstance(summary, str) or not summary.strip():
+        raise ValueError("summary is missing")
+    for key in ("description", "location"):
+        if not isinstance(data.get(key, ""), str):
+            raise ValueError(f"{key} must be a string")
+    try:
+        start = _to_local(datetime.datetime.fromisoformat(data["start_time_str"]))
+    except KeyError:
+        raise ValueError("start_time_str is missing") from None
+    except (TypeError, ValueError):
+        raise ValueError(
+            f"start_time_str {data['start_time_str']!r} is not an ISO datetime"
+        ) from None
+    duration = _positive_int(data.get("duration_minutes"), "duration_minutes")
+    if duration >= 24 * 60:
+        raise ValueError("duration_minutes must be under a day")
+
+    # As in the original loader, events repeat weekly unless told otherwise;
+    # "recurrence": null makes a one-off event
+    recurrence = None
+    count, until = data.get("count"), data.get("until")
+    rule = data.get("recurrence", "WEEKLY")
+    if rule is None and (count is not None or until is not None):
+        raise ValueError("count and until need a recurrence")
+    if rule is not None:
+        if not isinstance(rule, str):
+            raise ValueError("recurrence must be a string such as 'WEEKLY;BYDAY=MO'")
+        recurrence = Recurrence.parse(rule, count, until)
+        if recurrence.until is not None and recurrence.until < start:
+            raise ValueError("until is before the first occurrence")
+    return TemplateEvent(
+        summary=summary,
+        start=start,
+        duration_minutes=duration,
+        recurrence=recurrence,
+        description=data.get("description", ""),
+        location=data.get("location", ""),
+    )
+
+
+def compile_template(path: Path, content: bytes) -> ScheduleTemplate:
+    """Validate every event, raising one TemplateError listing all problems."""
+    try:
+        data = json.loads(content)
+    except ValueError as e:
+        raise TemplateError(path, [f"invalid JSON: {e}"]) from None
+    if not isinstance(data, list):
+        raise TemplateError(path, ["the template must be a list of events"])
+    events, errors = [], []
+    for index, item in enumerate(data, start=1):
+        try:
+            events.append(_validate_event(item))
+        except ValueError as e:
+            summary = item.get("summary") if isinstance(item, dict) else None
+            errors.append(f"  event {index} ({summary or 'no summary'}): {e}")
+    if errors:
+        raise TemplateError(path, errors)
+    return ScheduleTemplate(events)
+
+
+def _dump(template: ScheduleTemplate) -> dict[str, Any]:
+    events = []
+    for event in template.events:
+        item = asdict(event)
+        item["start"] = event.start.isoformat()
+        if event.recurrence is not None:
+            until = event.recurrence.until
+            item["recurrence"]["until"] = until.isoformat() if until else None
+        events.append(item)
+    return {"version": COMPILER_VERSION, "events": events}
+
+
+def _load(data: dict[str, Any]) -> ScheduleTemplate:
+    events = []
+    for item in data["events"]:
+        recurrence = item["recurrence"]
+        if recurrence is not None:
+            until = recurrence["until"]
+            recurrence = Recurrence(
+                freq=recurrence["freq"],
+                interval=recurrence["interval"],
+                byday=tuple(recurrence["byday"]),
+                count=recurrence["count"],
+                until=datetime.datetime.fromisoformat(until) if until else None,
+            )
+        events.append(
+            TemplateEvent(
+                summary=item["summary"],
+                start=datetime.datetime.fromisoformat(item["start"]),
+                duration_minutes=item["duration_minutes"],
+                recurrence=recurrence,
+                description=item["description"],
+                location=item["location"],
+            )
+        )
+    return ScheduleTemplate(events)
+
+
+def load_template(
+    path: str | Path, cache_dir: Path | None = DEFAULT_CACHE_DIR
+) -> ScheduleTemplate:
+    """Compiled template, from the cache when this exact content was seen before."""
+    path = Path(path)
+    content = path.read_bytes()
+    if cache_dir is None:
+        return compile_template(path, content)
+    digest = hashlib.blake2b(content, digest_size=16).hexdigest()
+    cache_file = cache_dir / f"{digest}.json"
+    try:
+        data = json.loads(cache_file.read_text())
+        if data.get("version") == COMPILER_VERSION:
+            return _load(data)
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    template = compile_template(path, content)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    temporary = cache_file.with_suffix(".tmp")
+    temporary.write_text(json.dumps(_dump(template)))
+    os.replace(temporary, cache_file)
+    return template
+
+
+def main(argv: list[str] | None = None) -> None:
+    today = datetime.date.today()
+    monday = today - timedelta(days=today.weekday())
+    parser = argparse.ArgumentParser(
+        description="Validate a schedule template and list its occurrences"
+    )
+    parser.add_argument("path", type=Path, help="JSON template (sample_events.json)")
+    parser.add_argument(
+        "--start",
+        type=datetime.date.fromisoformat,
+        default=monday,
+        help="YYYY-MM-DD (default: Monday of this week)",
+    )
+    parser.add_argument(
+        "--end",
+        type=datetime.date.fromisoformat,
+        default=monday + timedelta(days=6),
+        help="YYYY-MM-DD, inclusive (default: Sunday of this week)",
+    )
+    args = parser.parse_args(argv)
+
+    if not args.path.is_file():
+        print(f"Error: '{args.path}' is not a file")
+        return
+    try:
+        template = load_template(args.path)
+    except TemplateError as e:
+        print(f"Error: {e}")
+        return
+    for occurrence in template.occurrences(args.start, args.end):
+        print(
+            f"{occurrence.start.strftime('%a %Y-%m-%d %H:%M')}-"
+            f"{occurrence.end.strftime('%H:%M')}  {occurrence.summary}"
+        )
+
+
+if __name__ == "__main__":
+    main()
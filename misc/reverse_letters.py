@@ -1,10 +1,272 @@
-def reverse_letters(s):
-    return s[::-1]
+#!/usr/bin/env python3
+"""Reverse text by grapheme cluster, so "é" or "👩‍👩‍👧" stay in one piece.
+
+Files are memory-mapped and reversed chunk by chunk from the end, so memory
+use does not depend on the input size.
+"""
+
+import sys
+import re
+import mmap
+import argparse
+import unicodedata
+from pathlib import Path
+from typing import BinaryIO, Callable
+
+try:
+    import regex  # optional, full Unicode grapheme rules with \X
+except ImportError:
+    regex = None
+
+CHUNK_SIZE = 256 * 1024
+OUTPUT_BUFFER = 1024 * 1024
+
+ZWJ = "\u200d"
+REGIONAL_INDICATORS = "\U0001f1e6-\U0001f1ff"
+# Hangul jamo: leading consonants, vowels, trailing consonants and syllables
+HANGUL_L = "\u1100-\u115f\ua960-\ua97f"
+HANGUL_V = "\u1160-\u11a7\ud7b0-\ud7c6"
+HANGUL_T = "\u11a8-\u11ff\ud7cb-\ud7fb"
+HANGUL_SYLLABLES = "\uac00-\ud7a3"
+
+# (any cluster, clusters of several code points, characters that can join)
+_patterns: tuple[re.Pattern, re.Pattern, re.Pattern] | None = None
+
+
+def _extend_class() -> str:
+    """Combining marks (Mn/Me/Mc), ZWJ, skin tones and emoji tags as a [] class."""
+    ranges: list[list[int]] = []
+    for code in range(sys.maxunicode + 1):
+        if unicodedata.category(chr(code)) in ("Mn", "Me", "Mc"):
+            if ranges and ranges[-1][1] == code - 1:
+                ranges[-1][1] = code
+            else:
+                ranges.append([code, code])
+    ranges += [[0x200D, 0x200D], [0x1F3FB, 0x1F3FF], [0xE0020, 0xE007F]]
+    return "".join(
+        re.escape(chr(low)) + ("-" + re.escape(chr(high)) if high > low else "")
+        for low, high in ranges
+    )
+
+
+def _get_patterns() -> tuple[re.Pattern, re.Pattern, re.Pattern]:
+    """Simplified UAX #29 grapheme clusters, built once on first use."""
+    global _patterns
+    if _patterns is None:
+        ri = f"[{REGIONAL_INDICATORS}]"
+        lv = f"[{HANGUL_SYLLABLES}]"
+        hangul = (
+            f"[{HANGUL_L}]*(?:[{HANGUL_V}]+|{lv}[{HANGUL_V}]*)[{HANGUL_T}]*"
+            f"|[{HANGUL_L}]+|[{HANGUL_T}]+"
+        )
+        extenders = _extend_class()
+        # Atomic, so both cluster patterns pick the same base before the extenders
+        base = f"(?>{ri}{ri}|{hangul}|{ZWJ}?[^\r\n])"
+        extend = f"(?:{ZWJ}[^\r\n]|[{extenders}])"
+        _patterns = (
+            re.compile(f"\r\n|[\r\n]|{base}{extend}*"),
+            re.compile(f"{base}{extend}+|{ri}{ri}|{hangul}|{ZWJ}[^\r\n]"),
+            # The lookahead skips Latin text before the long class is tried
+            re.compile(
+                f"(?=[\u0300-\U0010ffff])[{extenders}{REGIONAL_INDICATORS}"
+                f"{HANGUL_L}{HANGUL_V}{HANGUL_T}{HANGUL_SYLLABLES}]"
+            ),
+        )
+    return _patterns
+
+
+def _is_regional_indicator(char: str) -> bool:
+    return "\U0001f1e6" <= char <= "\U0001f1ff"
+
+
+def grapheme_clusters(text: str) -> list[str]:
+    """Split text into user-perceived characters."""
+    if regex is not None:
+        return regex.findall(r"\X", text)
+    return _get_patterns()[0].findall(text)
+
+
+def _cluster_end(text: str, position: int) -> int:
+    if regex is not None:
+        return regex.match(r"\X", text, pos=position).end()
+    return _get_patterns()[0].match(text, position).end()
+
+
+def _reverse_run(text: str) -> str:
+    # Single code point clusters, except that CRLF must stay in order
+    return text[::-1].replace("\n\r", "\r\n")
+
+
+def _reverse_text(text: str) -> str:
+    """Reverse by cluster, slicing between the clusters of several code points.
+
+    Such a cluster starts on, or just before, a character that can join, so the
+    cluster pattern is only tried there instead of at every position.
+    """
+    if regex is not None:
+        return "".join(reversed(grapheme_clusters(text)))
+    _, multi, joining = _get_patterns()
+    pieces = []
+    position = 0
+    for found in joining.finditer(text):
+        candidate = found.start()
+        if candidate < position:
+            continue
+        match = None
+        for start in (candidate - 1, candidate):
+            if start >= position:
+                match = multi.match(text, start)
+                if match:
+                    break
+        if match is None:
+            continue
+        pieces.append(_reverse_run(text[position : match.start()]))
+        pieces.append(match.group())
+        position = match.end()
+    pieces.append(_reverse_run(text[position:]))
+    return "".join(reversed(pieces))
+
+
+def reverse_letters(s: str) -> str:
+    return _reverse_text(s)
+
+
+class BoundedWriter:
+    """Collects output pieces and writes them once OUTPUT_BUFFER bytes pile up."""
+
+    def __init__(self, output: BinaryIO, limit: int = OUTPUT_BUFFER) -> None:
+        self.output = output
+        self.limit = limit
+        self.pieces: list[bytes] = []
+        self.size = 0
+
+    def write(self, data: bytes) -> None:
+        self.pieces.append(data)
+        self.size += len(data)
+        if self.size >= self.limit:
+            self.flush()
+
+    def flush(self) -> None:
+        self.output.write(b"".join(self.pieces))
+        self.pieces.clear()
+        self.size = 0
+
+
+def _char_start(data: mmap.mmap, position: int, low: int) -> int:
+    """Move position back to the first byte of a UTF-8 character."""
+    while position > low and data[position] & 0xC0 == 0x80:
+        position -= 1
+    return position
+
+
+def _reverse_range(
+    data: mmap.mmap,
+    low: int,
+    high: int,
+    write: Callable[[bytes], None],
+    chunk_size: int = CHUNK_SIZE,
+) -> None:
+    """Write data[low:high] reversed by grapheme cluster, last chunk first.
+
+    The first cluster(s) of each chunk may continue bytes that come before it,
+    so they are held back and decoded again with the previous chunk.
+    """
+    end = high
+    window = chunk_size
+    while end > low:
+        start = _char_start(data, max(low, end - window), low)
+        chunk = data[start:end]
+        if chunk.isascii():
+            # Byte reversal, except that CRLF must stay in order
+            keep = 0
+            if start > low:
+                keep = 2 if chunk.startswith(b"\r\n") else 1
+                if keep >= len(chunk):
+                    window *= 2
+                    continue
+            write(chunk[keep:][::-1].replace(b"\n\r", b"\r\n"))
+            end = start + keep
+            window = chunk_size
+            continue
+
+        text = chunk.decode("utf-8")
+        keep = 0
+        if start > low:
+            # Regional indicators pair up from the left, keep the whole run
+            keep = _cluster_end(text, 0)
+            while keep < len(text) and _is_regional_indicator(text[keep]):
+                keep = _cluster_end(text, keep)
+            if keep >= len(text):
+                window *= 2  # one cluster longer than the window
+                continue
+        write(_reverse_text(text[keep:]).encode("utf-8"))
+        end = start + len(text[:keep].encode("utf-8"))
+        window = chunk_size
+
+
+def reverse_file(
+    source: Path,
+    output: BinaryIO,
+    line_mode: bool = False,
+    chunk_size: int = CHUNK_SIZE,
+) -> None:
+    """Reverse a UTF-8 file, whole (last character first) or each line in place."""
+    writer = BoundedWriter(output)
+    with open(source, "rb") as f:
+        if f.seek(0, 2) == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            if not line_mode:
+                _reverse_range(data, 0, len(data), writer.write, chunk_size)
+            else:
+                position = 0
+                while position < len(data):
+                    newline = data.find(b"\n", position)
+                    line_end = len(data) if newline == -1 else newline + 1
+                    text_end = line_end
+                    if newline != -1:
+                        crlf = newline > position and data[newline - 1] == 0x0D
+                        text_end = newline - 1 if crlf else newline
+                    _reverse_range(
+                        data, position, text_end, writer.write, chunk_size
+                    )
+                    writer.write(data[text_end:line_end])
+                    position = line_end
+    writer.flush()
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Reverse text by grapheme cluster (prompts when no file is given)"
+    )
+    parser.add_argument("path", nargs="?", help="UTF-8 file to reverse")
+    parser.add_argument("-o", "--output", help="output file (default: stdout)")
+    parser.add_argument(
+        "--lines",
+        action="store_true",
+        help="reverse each line, keeping the line order",
+    )
+    args = parser.parse_args(argv)
+
+    if args.path is None:
+        input_string = input("Enter a string to reverse: ")
+        reversed_string = reverse_letters(input_string)
+        print(f"Original: {input_string}")
+        print(f"Reversed: {reversed_string}")
+        return
+
+    source = Path(args.path)
+    if not source.is_file():
+        print(f"Error: '{args.path}' is not a file")
+        return
+
+    if args.output:
+        with open(args.output, "wb") as output:
+            reverse_file(source, output, args.lines)
+    else:
+        reverse_file(source, sys.stdout.buffer, args.lines)
+        sys.stdout.buffer.flush()
 
 
 if __name__ == "__main__":
-    # Example usage
-    input_string = input("Enter a string to reverse: ")
-    reversed_string = reverse_letters(input_string)
-    print(f"Original: {input_string}")
-    print(f"Reversed: {reversed_string}")
+    main()
@@ -1,25 +1,64 @@
 import PyPDF2
 import os
+import argparse
+from pathlib import Path
 
-# saisir le chemin du dossier contenant les fichiers PDF
-path = input("Entrez le chemin du dossier contenant les fichiers PDF: ")
+OUTPUT_NAME = "merged_output.pdf"
 
-pdfs = []
 
-for file in os.listdir(path):
-    if file.endswith(".pdf"):
-        print(file)
-        pdfs.append(PyPDF2.PdfReader(os.path.join(path, file)))
+def merge_pdfs(path: str) -> str:
+    """Merge every PDF of a folder into OUTPUT_NAME in that folder."""
+    pdfs = []
 
+    for file in os.listdir(path):
+        if file.endswith(".pdf") and file != OUTPUT_NAME:
+            print(file)
+            pdfs.append(PyPDF2.PdfReader(os.path.join(path, file)))
 
-# Créer un objet PdfFileMerger
-merger = PyPDF2.PdfMerger()
+    # Créer un objet PdfFileMerger
+    merger = PyPDF2.PdfMerger()
 
-# Ajouter les fichiers PDF à fusionner
-for pdf in pdfs:
-    merger.append(pdf)
+    # Ajouter les fichiers PDF à fusionner
+    for pdf in pdfs:
+        merger.append(pdf)
 
+    # Écrire le résultat dans un nouveau fichier PDF
+    output_path = os.path.join(path, OUTPUT_NAME)
+    with open(output_path, "wb") as output_file:
+        merger.write(output_file)
+    return output_path
 
-# Écrire le résultat dans un nouveau fichier PDF
-with open(os.path.join(path, "merged_output.pdf"), "wb") as output_file:
-    merger.write(output_file)
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Merge every PDF of a folder")
+    parser.add_argument("path", nargs="?", help="folder containing the PDF files")
+    parser.add_argument(
+        "--optimize",
+        action="store_true",
+        help="recompress and deduplicate the merged file (see optimize_pdf.py)",
+    )
+    parser.add_argument(
+        "--max-dpi",
+        type=int,
+        help="with --optimize, downsample images above this resolution",
+    )
+    args = parser.parse_args(argv)
+
+    path = args.path
+    if path is None:
+        # saisir le chemin du dossier contenant les fichiers PDF
+        path = input("Entrez le chemin du dossier contenant les fichiers PDF: ")
+    output_path = merge_pdfs(path)
+
+    if args.optimize:
+        # Pillow and the optimizer are only loaded when asked for
+        from optimize_pdf import Image, optimize_in_place
+
+        if args.max_dpi and Image is None:
+            print("Warning: Pillow is not installed, images are not downsampled")
+        report = optimize_in_place(Path(output_path), args.max_dpi)
+        print(f"{OUTPUT_NAME}: {report.summary()}")
+
+
+if __name__ == "__main__":
+    main()
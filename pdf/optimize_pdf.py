@@ -0,0 +1,462 @@
+#!/usr/bin/env python3
+"""Shrink a PDF: recompress streams, merge duplicate objects and optionally
+downsample images above a resolution.
+
+The streams of each page are rewritten in a process pool. Objects that no page
+(nor the catalog) uses are dropped. Downsampling needs Pillow, everything else
+only pdf_objects.
+"""
+
+import os
+import zlib
+import hashlib
+import argparse
+from io import BytesIO
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+try:
+    from PIL import Image  # optional, needed to downsample images
+except ImportError:
+    Image = None
+
+from pdf_objects import (
+    Name,
+    PdfDocument,
+    PdfError,
+    PdfWriter,
+    Ref,
+    Stream,
+    serialize,
+)
+
+JPEG_QUALITY = 75
+DEFAULT_PAGE_SIZE = (612.0, 792.0)  # US Letter, when a page has no MediaBox
+IMAGE_MODES = {"DeviceGray": "L", "DeviceRGB": "RGB"}
+ICC_MODES = {1: "L", 3: "RGB"}
+
+# Document opened once per worker process by _init_worker
+_worker_document: PdfDocument | None = None
+
+
+@dataclass
+class OptimizeReport:
+    input_size: int
+    output_size: int = 0
+    objects: int = 0
+    duplicates: int = 0
+    recompressed: int = 0
+    downsampled: int = 0
+    kept_original: bool = False
+
+    def summary(self) -> str:
+        if self.kept_original:
+            return f"{_megabytes(self.input_size)}, already optimal, left unchanged"
+        saved = self.input_size - self.output_size
+        percent = 100 * saved / self.input_size if self.input_size else 0.0
+        return (
+            f"{_megabytes(self.input_size)} -> {_megabytes(self.output_size)} "
+            f"({percent:.1f}% saved): {self.objects} objects kept, "
+            f"{self.duplicates} duplicates merged, {self.recompressed} streams "
+            f"recompressed, {self.downsampled} images downsampled"
+        )
+
+
+def _megabytes(size: int) -> str:
+    return f"{size / 1024 / 1024:.1f} MB"
+
+
+def _filters(document: PdfDocument, stream: Stream) -> list[Name]:
+    filters = document.resolve(stream.dict.get("Filter"))
+    return [filters] if isinstance(filters, Name) else list(filters or [])
+
+
+def _recompress(document: PdfDocument, stream: Stream) -> tuple[dict, bytes] | None:
+    """Deflate at the highest level, for raw or FlateDecode streams only.
+
+    The predictor of a FlateDecode stream applies to the inflated bytes, so
+    DecodeParms stays valid.
+    """
+    filters = _filters(document, stream)
+    if not filters:
+        raw = stream.data
+    elif filters == ["FlateDecode"]:
+        try:
+            raw = zlib.decompress(stream.data)
+        except zlib.error:
+            return None
+    else:
+        return None
+    data = zlib.compress(raw, 9)
+    if len(data) >= len(stream.data):
+        return None
+    return {**stream.dict, Name("Filter"): Name("FlateDecode")}, data
+
+
+def _image_mode(document: PdfDocument, color_space: Any) -> str | None:
+    color_space = document.resolve(color_space)
+    if isinstance(color_space, list) and color_space[:1] == ["ICCBased"]:
+        profile = document.resolve(color_space[1])
+        return ICC_MODES.get(profile.dict.get("N")) if profile else None
+    return IMAGE_MODES.get(color_space) if isinstance(color_space, str) else None
+
+
+def effective_dpi(width: int, height: int, page_size: tuple[float, float]) -> float:
+    """Resolution of an image if it covered the whole page, in either orientation.
+
+    An image drawn smaller than the page really has a higher resolution, so this
+    never overestimates it.
+    """
+    page_width, page_height = (max(side, 1.0) / 72 for side in page_size)
+    return min(
+        max(width / page_width, height / page_height),
+        max(width / page_height, height / page_width),
+    )
+
+
+def _downsample(
+    document: PdfDocument,
+    stream: Stream,
+    page_size: tuple[float, float],
+    max_dpi: int,
+) -> tuple[dict, bytes] | None:
+    """Resize an 8-bit gray or RGB image (JPEG or deflated) down to max_dpi."""
+    info = {
+        key: document.resolve(stream.dict.get(key))
+        for key in ("Width", "Height", "BitsPerComponent", "ImageMask", "Decode")
+    }
+    width, height = info["Width"], info["Height"]
+    # Masks, inverted samples and soft masks (which may need the same size) stay
+    if (
+        info["ImageMask"]
+        or info["Decode"]
+        or info["BitsPerComponent"] != 8
+        or "SMask" in stream.dict
+        or not isinstance(width, int)
+        or not isinstance(height, int)
+    ):
+        return None
+    mode = _image_mode(document, stream.dict.get("ColorSpace"))
+    dpi = effective_dpi(width, height, page_size)
+    if mode is None or dpi <= max_dpi:
+        return None
+    scale = max_dpi / dpi
+    size = (max(1, round(width * scale)), max(1, round(height * scale)))
+
+    filters = _filters(document, stream)
+    try:
+        if filters == ["DCTDecode"]:
+            image = Image.open(BytesIO(stream.data))
+            if image.mode != mode:
+                return None
+            output = BytesIO()
+            image.resize(size, Image.LANCZOS).save(
+                output, "JPEG", quality=JPEG_QUALITY, optimize=True
+            )
+            data = output.getvalue()
+        elif filters in ([], ["FlateDecode"]) and not stream.dict.get("DecodeParms"):
+            raw = zlib.decompress(stream.data) if filters else stream.data
+            image = Image.frombytes(mode, (width, height), raw)
+            data = zlib.compress(image.resize(size, Image.LANCZOS).tobytes(), 9)
+            filters = [Name("FlateDecode")]
+        else:
+            return None
+    except (OSError, ValueError, zlib.error):
+        return None
+    if len(data) >= len(stream.data):
+        return None
+
+    new_dict = {k: v for k, v in stream.dict.items() if k != "DecodeParms"}
+    new_dict[Name("Width")], new_dict[Name("Height")] = size
+    new_dict[Name("Filter")] = filters[0]
+    return new_dict, data
+
+
+def _init_worker(
+    path: Path, xref: dict[int, tuple[int, int, int]], trailer: dict[Name, Any]
+) -> None:
+    global _worker_document
+    _worker_document = PdfDocument(path, xref=xref, trailer=trailer)
+
+
+def _optimize_page(
+    task: tuple[list[int], tuple[float, float] | None, int | None],
+) -> list[tuple[int, dict, bytes, str]]:
+    """Rewrite the streams a page owns; returns only the ones that got smaller."""
+    nums, page_size, max_dpi = task
+    document = _worker_document
+    results = []
+    for num in nums:
+        stream = document.get(num)
+        document.objects.pop(num, None)  # do not keep every page's data around
+        if (
+            max_dpi
+            and page_size
+            and Image is not None
+            and stream.dict.get("Subtype") == "Image"
+        ):
+            downsampled = _downsample(document, stream, page_size, max_dpi)
+            if downsampled is not None:
+                results.append((num, *downsampled, "downsampled"))
+                continue
+        recompressed = _recompress(document, stream)
+        if recompressed is not None:
+            results.append((num, *recompressed, "recompressed"))
+    return results
+
+
+def _walk(
+    document: PdfDocument,
+    start: Any,
+    excluded: set[int],
+    objects: dict[int, Any],
+    stream_dicts: dict[int, dict],
+) -> list[int]:
+    """Load what start references and was not seen yet; returns the new streams.
+
+    Only the dictionary of a stream is kept here, the workers read its data.
+    """
+    owned = []
+    stack = [start]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, Ref):
+            num = value.num
+            if (
+                num in excluded
+                or num in objects
+                or num in stream_dicts
+                or document.xref.get(num) is None
+            ):
+                continue
+            value = document.get(num)
+            if isinstance(value, Stream):
+                document.objects.pop(num, None)
+                # The writer computes /Length, drop it and the object it may point to
+                value = {k: v for k, v in value.dict.items() if k != "Length"}
+                stream_dicts[num] = value
+                owned.append(num)
+            else:
+                objects[num] = value
+            stack.append(value)
+        elif isinstance(value, list):
+            stack.extend(value)
+        elif isinstance(value, dict):
+            stack.extend(value.values())
+    return owned
+
+
+def _renumber(value: Any, mapping: dict[int, int]) -> Any:
+    if isinstance(value, Ref):
+        return Ref(mapping.get(value.num, value.num))
+    if isinstance(value, list):
+        return [_renumber(item, mapping) for item in value]
+    if isinstance(value, dict):
+        return {key: _renumber(item, mapping) for key, item in value.items()}
+    if isinstance(value, Stream):
+        return Stream(_renumber(value.dict, mapping), value.data)
+    return value
+
+
+def merge_duplicates(objects: dict[int, Any]) -> dict[int, int]:
+    """Map the number of each duplicate object to the first identical one.
+
+    Merging two fonts can make the dictionaries that use them identical, so
+    passes repeat until one merges nothing.
+    """
+    data_digests = {
+        num: hashlib.blake2b(value.data, digest_size=16).digest()
+        for num, value in objects.items()
+        if isinstance(value, Stream)
+    }
+    canonical: dict[int, int] = {}
+    while True:
+        first_seen: dict[bytes, int] = {}
+        merged = 0
+        for num, value in objects.items():
+            if num in canonical:
+                continue
+            value = _renumber(value, canonical)
+            if isinstance(value, Stream):
+                key = b"stream" + serialize(value.dict) + data_digests[num]
+            else:
+                key = serialize(value)
+            first = first_seen.setdefault(key, num)
+            if first != num:
+                canonical[num] = first
+                merged += 1
+        if not merged:
+            return canonical
+
+
+def optimize_pdf(
+    source: Path,
+    output: Path,
+    max_dpi: int | None = None,
+    workers: int | None = None,
+) -> OptimizeReport:
+    """Write an optimized copy of source to output (which must be another file)."""
+    report = OptimizeReport(input_size=source.stat().st_size)
+    with PdfDocument(source) as document:
+        pages, nodes = document.page_tree()
+        root = document.trailer["Root"]
+        page_numbers = {ref.num for ref, _ in pages}
+        tree_nodes = {ref.num for ref in nodes}
+        if isinstance(root, Ref):
+            tree_nodes.add(root.num)
+        excluded = page_numbers | tree_nodes
+
+        objects: dict[int, Any] = {}
+        stream_dicts: dict[int, dict] = {}
+        page_dicts = []
+        tasks = []
+        for ref, inherited in pages:
+            page = {
+                **inherited,
+                **{k: v for k, v in document.get(ref).items() if k != "Parent"},
+            }
+            page_dicts.append(page)
+            owned = _walk(document, page, excluded, objects, stream_dicts)
+            media_box = document.resolve(page.get("MediaBox")) or []
+            box = [document.resolve(side) for side in media_box]
+            page_size = (
+                (abs(box[2] - box[0]), abs(box[3] - box[1]))
+                if len(box) == 4
+                else DEFAULT_PAGE_SIZE
+            )
+            tasks.append((owned, page_size, max_dpi))
+        # Outlines, forms, metadata, attachments: no page size, never downsampled
+        catalog = {k: v for k, v in document.resolve(root).items() if k != "Pages"}
+        info = document.trailer.get("Info")
+        owned = _walk(document, [catalog, info], excluded, objects, stream_dicts)
+        tasks.append((owned, None, None))
+
+        optimized: dict[int, tuple[dict, bytes]] = {}
+        initargs = (source, document.xref, document.trailer)
+        with ProcessPoolExecutor(
+            workers, initializer=_init_worker, initargs=initargs
+        ) as pool:
+            for results in pool.map(_optimize_page, tasks, chunksize=8):
+                for num, stream_dict, data, kind in results:
+                    optimized[num] = (stream_dict, data)
+                    if kind == "downsampled":
+                        report.downsampled += 1
+                    else:
+                        report.recompressed += 1
+
+        for num, stream_dict in stream_dicts.items():
+            if num in optimized:
+                new_dict, data = optimized.pop(num)
+                new_dict = {k: v for k, v in new_dict.items() if k != "Length"}
+            else:
+                new_dict, data = stream_dict, document.get(num).data
+                document.objects.pop(num, None)
+            objects[num] = Stream(new_dict, data)
+
+        canonical = merge_duplicates(objects)
+        report.duplicates = len(canonical)
+
+        writer = PdfWriter()
+        catalog_ref = writer.reserve()
+        pages_ref = writer.reserve()
+        mapping = {ref.num: writer.reserve() for ref, _ in pages}
+        for num in objects:
+            if num not in canonical:
+                mapping[num] = writer.reserve()
+        report.objects = len(writer.objects)
+
+        def translate(value: Any) -> Any:
+            if isinstance(value, Ref):
+                return mapping.get(canonical.get(value.num, value.num))
+            if isinstance(value, list):
+                return [translate(item) for item in value]
+            if isinstance(value, dict):
+                return {key: translate(item) for key, item in value.items()}
+            if isinstance(value, Stream):
+                return Stream(translate(value.dict), value.data)
+            return value
+
+        kids = []
+        for (ref, _), page in zip(pages, page_dicts):
+            page = translate(page)
+            page[Name("Parent")] = pages_ref
+            writer.set(mapping[ref.num], page)
+            kids.append(mapping[ref.num])
+        for num, value in objects.items():
+            if num not in canonical:
+                writer.set(mapping[num], translate(value))
+        writer.set(
+            pages_ref,
+            {Name("Type"): Name("Pages"), Name("Kids"): kids, Name("Count"): len(kids)},
+        )
+        catalog = translate(catalog)
+        catalog[Name("Type")] = Name("Catalog")
+        catalog[Name("Pages")] = pages_ref
+        writer.set(catalog_ref, catalog)
+        info_ref = translate(info)
+        if isinstance(info_ref, dict):
+            info_ref = writer.add(info_ref)
+        with open(output, "wb") as f:
+            writer.write(f, catalog_ref, info_ref, object_streams=True)
+
+    report.output_size = output.stat().st_size
+    return report
+
+
+def optimize_in_place(
+    path: Path, max_dpi: int | None = None, workers: int | None = None
+) -> OptimizeReport:
+    """Replace path with its optimized copy, unless that is not smaller."""
+    temporary = path.with_name(f"{path.name}.optimizing")
+    try:
+        report = optimize_pdf(path, temporary, max_dpi, workers)
+    except BaseException:
+        temporary.unlink(missing_ok=True)
+        raise
+    if report.output_size >= report.input_size:
+        temporary.unlink()
+        report.kept_original = True
+    else:
+        os.replace(temporary, path)
+    return report
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Recompress streams, merge duplicate objects and downsample images"
+    )
+    parser.add_argument("path", type=Path)
+    parser.add_argument(
+        "-o", "--output", type=Path, help="output file (default: replace the input)"
+    )
+    parser.add_argument(
+        "--max-dpi",
+        type=int,
+        help="downsample images above this resolution (needs Pillow)",
+    )
+    parser.add_argument(
+        "--workers", type=int, help="worker processes (default: one per CPU)"
+    )
+    args = parser.parse_args(argv)
+
+    if not args.path.is_file():
+        print(f"Error: '{args.path}' is not a file")
+        return
+    if args.max_dpi and Image is None:
+        print("Warning: Pillow is not installed, images are not downsampled")
+
+    try:
+        if args.output and args.output.resolve() != args.path.resolve():
+            report = optimize_pdf(args.path, args.output, args.max_dpi, args.workers)
+        else:
+            report = optimize_in_place(args.path, args.max_dpi, args.workers)
+    except PdfError as e:
+        print(f"Error: {e}")
+        return
+    print(f"{args.output or args.path}: {report.summary()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,528 @@
+"""Minimal PDF object reader and writer.
+
+Reads the cross-reference data (tables, xref streams and object streams) and
+parses objects on demand, so a few pages can be copied out of a large file
+without loading the rest. Streams are kept encoded; only FlateDecode (with PNG
+predictors) is decoded, for xref and object streams.
+"""
+
+import re
+import mmap
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, BinaryIO
+
+WHITESPACE = b"\x00\t\n\x0c\r "
+REGULAR = re.compile(rb"[^\x00\t\n\x0c\r ()<>\[\]{}/%]+")
+INTEGER = re.compile(rb"[+-]?\d+$")
+OBJECT_HEADER = re.compile(rb"\s*(\d+)\s+(\d+)\s+obj")
+# Pages attributes inherited from the page tree (PDF 32000 7.7.3.4)
+INHERITABLE = ("Resources", "MediaBox", "CropBox", "Rotate")
+OBJECT_STREAM_SIZE = 100
+
+
+class PdfError(Exception):
+    pass
+
+
+class Name(str):
+    """A PDF name, stored without the leading slash and with #xx escapes intact."""
+
+
+class String(bytes):
+    """A literal string, stored with its escapes so it is written back unchanged."""
+
+
+class HexString(bytes):
+    pass
+
+
+@dataclass(frozen=True)
+class Ref:
+    num: int
+    gen: int = 0
+
+
+@dataclass
+class Stream:
+    dict: dict[Name, Any]
+    data: bytes  # still encoded with dict["Filter"]
+
+
+class Parser:
+    def __init__(self, data: bytes | mmap.mmap, position: int = 0) -> None:
+        self.data = data
+        self.position = position
+
+    def skip_whitespace(self) -> None:
+        data = self.data
+        while self.position < len(data):
+            char = data[self.position]
+            if char in WHITESPACE:
+                self.position += 1
+            elif char == 0x25:  # % comment up to the end of line
+                while self.position < len(data) and data[self.position] not in b"\r\n":
+                    self.position += 1
+            else:
+                return
+
+    def token(self) -> bytes:
+        self.skip_whitespace()
+        match = REGULAR.match(self.data, self.position)
+        if not match:
+            raise PdfError(f"Expected a token at offset {self.position}")
+        self.position = match.end()
+        return match.group()
+
+    def parse(self) -> Any:
+        self.skip_whitespace()
+        data = self.data
+        char = data[self.position : self.position + 1]
+        if char == b"/":
+            match = REGULAR.match(data, self.position + 1)
+            end = match.end() if match else self.position + 1
+            name = Name(data[self.position + 1 : end].decode("latin-1"))
+            self.position = end
+            return name
+        if char == b"<":
+            if data[self.position + 1 : self.position + 2] == b"<":
+                return self._parse_dict()
+            end = data.find(b">", self.position)
+            value = HexString(data[self.position + 1 : end])
+            self.position = end + 1
+            return value
+        if char == b"(":
+            return self._parse_literal()
+        if char == b"[":
+            self.position += 1
+            items = []
+            while True:
+                self.skip_whitespace()
+                if data[self.position : self.position + 1] == b"]":
+                    self.position += 1
+                    return items
+                items.append(self.parse())
+
+        token = self.token()
+        if INTEGER.match(token):
+            # "num gen R" is a reference, otherwise a plain integer
+            saved = self.position
+            try:
+                gen = self.token()
+                if INTEGER.match(gen) and self.token() == b"R":
+                    return Ref(int(token), int(gen))
+            except PdfError:
+                pass
+            self.position = saved
+            return int(token)
+        if token == b"true":
+            return True
+        if token == b"false":
+            return False
+        if token == b"null":
+            return None
+        try:
+            return float(token)
+        except ValueError:
+            raise PdfError(f"Unexpected token {token!r} at offset {self.position}")
+
+    def _parse_dict(self) -> dict[Name, Any]:
+        self.position += 2
+        result: dict[Name, Any] = {}
+        while True:
+            self.skip_whitespace()
+            if self.data[self.position : self.position + 2] == b">>":
+                self.position += 2
+                return result
+            key = self.parse()
+            if not isinstance(key, Name):
+                raise PdfError(f"Dictionary key expected at offset {self.position}")
+            result[key] = self.parse()
+
+    def _parse_literal(self) -> String:
+        data = self.data
+        start = self.position + 1
+        position = start
+        depth = 1
+        while depth:
+            char = data[position]
+            if char == 0x5C:  # backslash escapes the next byte
+                position += 2
+                continue
+            if char == 0x28:
+                depth += 1
+            elif char == 0x29:
+                depth -= 1
+            position += 1
+        self.position = position
+        return String(data[start : position - 1])
+
+
+def _png_unpredict(data: bytes, columns: int, bytes_per_pixel: int) -> bytes:
+    row_size = columns
+    previous = bytearray(row_size)
+    output = bytearray()
+    for start in range(0, len(data), row_size + 1):
+        kind = data[start]
+        row = bytearray(data[start + 1 : start + 1 + row_size])
+        for i in range(len(row)):
+            left = row[i - bytes_per_pixel] if i >= bytes_per_pixel else 0
+            up = previous[i]
+            if kind == 1:
+                row[i] = (row[i] + left) & 0xFF
+            elif kind == 2:
+                row[i] = (row[i] + up) & 0xFF
+            elif kind == 3:
+                row[i] = (row[i] + (left + up) // 2) & 0xFF
+            elif kind == 4:
+                up_left = previous[i - bytes_per_pixel] if i >= bytes_per_pixel else 0
+                estimate = left + up - up_left
+                distances = (
+                    abs(estimate - left),
+                    abs(estimate - up),
+                    abs(estimate - up_left),
+                )
+                best = (left, up, up_left)[distances.index(min(distances))]
+                row[i] = (row[i] + best) & 0xFF
+        output += row
+        previous = row
+    return bytes(output)
+
+
+def decode_stream(stream: Stream) -> bytes:
+    """Decode a stream with no filter or FlateDecode (PNG predictors included)."""
+    filters = stream.dict.get("Filter")
+    filters = [filters] if isinstance(filters, Name) else filters or []
+    if not filters:
+        return stream.data
+    if filters != ["FlateDecode"]:
+        raise PdfError(f"Unsupported stream filter {filters}")
+    data = zlib.decompress(stream.data)
+    params = stream.dict.get("DecodeParms")
+    if isinstance(params, list):
+        params = params[0]
+    if params and params.get("Predictor", 1) >= 10:
+        colors = params.get("Colors", 1)
+        bits = params.get("BitsPerComponent", 8)
+        columns = params.get("Columns", 1) * colors * bits // 8
+        data = _png_unpredict(data, columns, max(1, colors * bits // 8))
+    return data
+
+
+class PdfDocument:
+    """Random access to the objects of a PDF file.
+
+    xref maps object numbers to (1, offset, generation) for plain objects or
+    (2, object stream number, index) for compressed ones. It can be passed in
+    from a cache, in which case the file is not scanned at all.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        xref: dict[int, tuple[int, int, int]] | None = None,
+        trailer: dict[Name, Any] | None = None,
+    ) -> None:
+        self.path = Path(path)
+        self.file = open(self.path, "rb")
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.objects: dict[int, Any] = {}
+        self.object_streams: dict[int, tuple[bytes, list[int], int]] = {}
+        if xref is None or trailer is None:
+            self.xref: dict[int, tuple[int, int, int]] = {}
+            self.trailer: dict[Name, Any] = {}
+            self._read_xref()
+        else:
+            self.xref = xref
+            self.trailer = trailer
+        if "Encrypt" in self.trailer:
+            raise PdfError(f"{self.path} is encrypted")
+
+    def close(self) -> None:
+        self.data.close()
+        self.file.close()
+
+    def __enter__(self) -> "PdfDocument":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def _read_xref(self) -> None:
+        tail = self.data.rfind(b"startxref")
+        if tail == -1:
+            raise PdfError(f"{self.path} has no startxref")
+        offset = int(Parser(self.data, tail + len(b"startxref")).token())
+        seen = set()
+        # Newest section first; older sections never override newer entries
+        while offset is not None and offset not in seen:
+            seen.add(offset)
+            parser = Parser(self.data, offset)
+            parser.skip_whitespace()
+            if self.data[parser.position : parser.position + 4] == b"xref":
+                trailer = self._read_xref_table(parser)
+                if "XRefStm" in trailer:
+                    self._read_xref_stream(trailer["XRefStm"])
+            else:
+                trailer = self._read_xref_stream(parser.position)
+            for key, value in trailer.items():
+                self.trailer.setdefault(key, value)
+            offset = trailer.get("Prev")
+
+    def _read_xref_table(self, parser: Parser) -> dict[Name, Any]:
+        parser.token()  # "xref"
+        while True:
+            token = parser.token()
+            if token == b"trailer":
+                return parser.parse()
+            first, count = int(token), int(parser.token())
+            for num in range(first, first + count):
+                offset, gen, kind = parser.token(), parser.token(), parser.token()
+                if kind == b"n":
+                    self.xref.setdefault(num, (1, int(offset), int(gen)))
+
+    def _read_xref_stream(self, offset: int) -> dict[Name, Any]:
+        stream = self._parse_at(offset)
+        if not isinstance(stream, Stream):
+            raise PdfError(f"No xref stream at offset {offset}")
+        data = decode_stream(stream)
+        widths = stream.dict["W"]
+        index = stream.dict.get("Index", [0, stream.dict["Size"]])
+        row_size = sum(widths)
+        position = 0
+        for first, count in zip(index[::2], index[1::2]):
+            for num in range(first, first + count):
+                fields = []
+                for width in widths:
+                    value = int.from_bytes(data[position : position + width], "big")
+                    fields.append(value)
+                    position += width
+                kind = fields[0] if widths[0] else 1
+                if kind in (1, 2):
+                    self.xref.setdefault(num, (kind, fields[1], fields[2]))
+        if position > len(data) or row_size == 0:
+            raise PdfError(f"Truncated xref stream at offset {offset}")
+        return stream.dict
+
+    def _parse_at(self, offset: int) -> Any:
+        match = OBJECT_HEADER.match(self.data, offset)
+        if not match:
+            raise PdfError(f"No object at offset {offset}")
+        parser = Parser(self.data, match.end())
+        value = parser.parse()
+        parser.skip_whitespace()
+        stream_keyword = self.data[parser.position : parser.position + 6]
+        if isinstance(value, dict) and stream_keyword == b"stream":
+            start = parser.position + len(b"stream")
+            if self.data[start : start + 2] == b"\r\n":
+                start += 2
+            elif self.data[start : start + 1] in (b"\n", b"\r"):
+                start += 1
+            length = value.get("Length")
+            if isinstance(length, Ref):
+                length = self.get(length)
+            end = start + length if isinstance(length, int) else -1
+            if end < 0 or self.data.find(b"endstream", end, end + 32) == -1:
+                # Wrong or missing /Length: trust the endstream keyword
+                end = self.data.find(b"endstream", start)
+                while self.data[end - 1 : end] in (b"\n", b"\r"):
+                    end -= 1
+            return Stream(value, self.data[start:end])
+        return value
+
+    def _object_stream(self, num: int) -> tuple[bytes, list[int], int]:
+        cached = self.object_streams.get(num)
+        if cached is None:
+            stream = self.get(num)
+            data = decode_stream(stream)
+            header = Parser(data)
+            offsets = []
+            for _ in range(stream.dict["N"]):
+                header.token()
+                offsets.append(int(header.token()))
+            cached = (data, offsets, stream.dict["First"])
+            self.object_streams[num] = cached
+        return cached
+
+    def get(self, ref: Ref | int) -> Any:
+        """The object with this number (None if it does not exist)."""
+        num = ref.num if isinstance(ref, Ref) else ref
+        if num in self.objects:
+            return self.objects[num]
+        entry = self.xref.get(num)
+        if entry is None:
+            value = None
+        elif entry[0] == 1:
+            value = self._parse_at(entry[1])
+        else:
+            data, offsets, first = self._object_stream(entry[1])
+            value = Parser(data, first + offsets[entry[2]]).parse()
+        self.objects[num] = value
+        return value
+
+    def resolve(self, value: Any) -> Any:
+        return self.get(value) if isinstance(value, Ref) else value
+
+    def page_tree(self) -> tuple[list[tuple[Ref, dict[Name, Any]]], list[Ref]]:
+        """Leaf pages in order with the attributes they inherit, and the tree nodes."""
+        pages: list[tuple[Ref, dict[Name, Any]]] = []
+        nodes: list[Ref] = []
+        root = self.resolve(self.trailer["Root"])
+        stack: list[tuple[Any, dict[Name, Any]]] = [(root["Pages"], {})]
+        seen = set()
+        while stack:
+            ref, inherited = stack.pop()
+            if ref in seen:
+                continue
+            seen.add(ref)
+            node = self.resolve(ref)
+            if node.get("Type") == "Pages" or "Kids" in node:
+                nodes.append(ref)
+                inherited = {
+                    **inherited,
+                    **{key: node[key] for key in INHERITABLE if key in node},
+                }
+                stack.extend((kid, inherited) for kid in reversed(node["Kids"]))
+            else:
+                missing = {k: v for k, v in inherited.items() if k not in node}
+                pages.append((ref, missing))
+        return pages, nodes
+
+
+def serialize(value: Any) -> bytes:
+    if value is None:
+        return b"null"
+    if value is True:
+        return b"true"
+    if value is False:
+        return b"false"
+    if isinstance(value, Name):
+        return b"/" + value.encode("latin-1")
+    if isinstance(value, int):
+        return b"%d" % value
+    if isinstance(value, float):
+        return (b"%.6f" % value).rstrip(b"0").rstrip(b".") or b"0"
+    if isinstance(value, Ref):
+        return b"%d %d R" % (value.num, value.gen)
+    if isinstance(value, String):
+        return b"(" + value + b")"
+    if isinstance(value, HexString):
+        return b"<" + value + b">"
+    if isinstance(value, list):
+        return b"[" + b" ".join(serialize(item) for item in value) + b"]"
+    if isinstance(value, dict):
+        items = b"".join(
+            serialize(Name(key)) + b" " + serialize(item) for key, item in value.items()
+        )
+        return b"<<" + items + b">>"
+    if isinstance(value, Stream):
+        header = {**value.dict, Name("Length"): len(value.data)}
+        return serialize(header) + b"\nstream\n" + value.data + b"\nendstream"
+    raise PdfError(f"Cannot serialize {value!r}")
+
+
+class PdfWriter:
+    """Collects numbered objects and writes them with an xref table or stream."""
+
+    def __init__(self) -> None:
+        self.objects: list[Any] = []
+
+    def reserve(self) -> Ref:
+        self.objects.append(None)
+        return Ref(len(self.objects))
+
+    def set(self, ref: Ref, value: Any) -> None:
+        self.objects[ref.num - 1] = value
+
+    def add(self, value: Any) -> Ref:
+        ref = self.reserve()
+        self.set(ref, value)
+        return ref
+
+    def write(
+        self,
+        output: BinaryIO,
+        root: Ref,
+        info: Ref | None = None,
+        object_streams: bool = False,
+    ) -> None:
+        """Write the file; object_streams packs the non-stream objects (PDF 1.5)."""
+        output.write(b"%PDF-1.7\n%\xe2\xe3\xcf\xd3\n")
+        position = 15
+        # num -> (1, offset) or (2, object stream number, index in it)
+        entries: dict[int, tuple[int, ...]] = {}
+        packed: list[tuple[int, bytes]] = []
+        size = len(self.objects) + 1
+
+        def write_object(num: int, value: Any) -> None:
+            nonlocal position
+            entries[num] = (1, position)
+            chunk = b"%d 0 obj\n" % num + serialize(value) + b"\nendobj\n"
+            output.write(chunk)
+            position += len(chunk)
+
+        def flush_packed() -> None:
+            nonlocal size
+            stream_num = size
+            size += 1
+            offsets = []
+            body = b""
+            for index, (num, data) in enumerate(packed):
+                entries[num] = (2, stream_num, index)
+                offsets.append(b"%d %d" % (num, len(body)))
+                body += data + b"\n"
+            header = b" ".join(offsets) + b"\n"
+            stream_dict = {
+                Name("Type"): Name("ObjStm"),
+                Name("N"): len(packed),
+                Name("First"): len(header),
+                Name("Filter"): Name("FlateDecode"),
+            }
+            write_object(stream_num, Stream(stream_dict, zlib.compress(header + body)))
+            packed.clear()
+
+        for num, value in enumerate(self.objects, start=1):
+            if object_streams and not isinstance(value, Stream):
+                packed.append((num, serialize(value)))
+                if len(packed) == OBJECT_STREAM_SIZE:
+                    flush_packed()
+            else:
+                write_object(num, value)
+        if packed:
+            flush_packed()
+
+        trailer: dict[Name, Any] = {Name("Size"): size, Name("Root"): root}
+        if info is not None:
+            trailer[Name("Info")] = info
+        if not object_streams:
+            output.write(b"xref\n0 %d\n0000000000 65535 f \n" % size)
+            offsets = (entries[num][1] for num in range(1, size))
+            output.write(b"".join(b"%010d 00000 n \n" % offset for offset in offsets))
+            output.write(b"trailer\n" + serialize(trailer))
+            output.write(b"\nstartxref\n%d\n%%%%EOF\n" % position)
+            return
+
+        # The xref stream lists itself, as the last object
+        xref_num = size
+        size += 1
+        entries[xref_num] = (1, position)
+        offset_width = max(4, (position.bit_length() + 7) // 8)
+        rows = [b"\x00" + bytes(offset_width) + b"\xff\xff"]
+        for num in range(1, size):
+            kind, field, *index = entries[num]
+            rows.append(
+                bytes([kind])
+                + field.to_bytes(offset_width, "big")
+                + (index[0] if index else 0).to_bytes(2, "big")
+            )
+        xref_dict = {
+            Name("Type"): Name("XRef"),
+            **trailer,
+            Name("Size"): size,
+            Name("W"): [1, offset_width, 2],
+            Name("Filter"): Name("FlateDecode"),
+        }
+        start = position
+        write_object(xref_num, Stream(xref_dict, zlib.compress(b"".join(rows))))
+        output.write(b"startxref\n%d\n%%%%EOF\n" % start)
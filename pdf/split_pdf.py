@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""Extract page ranges from a PDF, or split it into parts.
+
+The xref table and the page list are parsed once and cached on disk, keyed by
+the file's hash, so later extractions only read the objects of the requested
+pages.
+"""
+
+import os
+import json
+import hashlib
+import argparse
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from pdf_objects import (
+    Name,
+    Parser,
+    PdfDocument,
+    PdfError,
+    PdfWriter,
+    Ref,
+    Stream,
+    serialize,
+)
+
+DEFAULT_INDEX_DIR = Path.home() / ".cache" / "toolbox" / "pdf_index"
+INDEX_VERSION = 1
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+@dataclass
+class PageIndex:
+    xref: dict[int, tuple[int, int, int]]
+    root: Ref
+    pages: list[tuple[Ref, dict[Name, Any]]]
+    tree_nodes: set[int]
+
+    @property
+    def page_numbers(self) -> set[int]:
+        return {ref.num for ref, _ in self.pages}
+
+
+def file_hash(path: Path) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        while block := f.read(HASH_BLOCK_SIZE):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _cached_hash(path: Path, index_dir: Path) -> str:
+    """Hash of the file, recomputed only when its size or mtime changed."""
+    hashes_file = index_dir / "hashes.json"
+    try:
+        hashes = json.loads(hashes_file.read_text())
+    except (OSError, ValueError):
+        hashes = {}
+    stat = path.stat()
+    key = str(path.resolve())
+    cached = hashes.get(key)
+    if cached and cached[:2] == [stat.st_size, stat.st_mtime_ns]:
+        return cached[2]
+    digest = file_hash(path)
+    hashes[key] = [stat.st_size, stat.st_mtime_ns, digest]
+    hashes_file.write_text(json.dumps(hashes))
+    return digest
+
+
+def _build_index(path: Path) -> PageIndex:
+    with PdfDocument(path) as document:
+        pages, nodes = document.page_tree()
+        return PageIndex(
+            xref=document.xref,
+            root=document.trailer["Root"],
+            pages=pages,
+            tree_nodes={ref.num for ref in nodes},
+        )
+
+
+def _dump_index(index: PageIndex) -> dict[str, Any]:
+    return {
+        "version": INDEX_VERSION,
+        "xref": {str(num): list(entry) for num, entry in index.xref.items()},
+        "root": [index.root.num, index.root.gen],
+        "pages": [
+            [
+                ref.num,
+                ref.gen,
+                {
+                    key: serialize(value).decode("latin-1")
+                    for key, value in inherited.items()
+                },
+            ]
+            for ref, inherited in index.pages
+        ],
+        "tree_nodes": sorted(index.tree_nodes),
+    }
+
+
+def _load_index(data: dict[str, Any]) -> PageIndex:
+    return PageIndex(
+        xref={int(num): tuple(entry) for num, entry in data["xref"].items()},
+        root=Ref(*data["root"]),
+        pages=[
+            (
+                Ref(num, gen),
+                {
+                    Name(key): Parser(value.encode("latin-1")).parse()
+                    for key, value in inherited.items()
+                },
+            )
+            for num, gen, inherited in data["pages"]
+        ],
+        tree_nodes=set(data["tree_nodes"]),
+    )
+
+
+def load_page_index(path: Path, index_dir: Path = DEFAULT_INDEX_DIR) -> PageIndex:
+    """Page index of a PDF, from the cache when this exact file was seen before."""
+    index_dir.mkdir(parents=True, exist_ok=True)
+    cache_file = index_dir / f"{_cached_hash(path, index_dir)}.json"
+    if cache_file.exists():
+        data = json.loads(cache_file.read_text())
+        if data.get("version") == INDEX_VERSION:
+            return _load_index(data)
+    index = _build_index(path)
+    temporary = cache_file.with_suffix(".tmp")
+    temporary.write_text(json.dumps(_dump_index(index)))
+    os.replace(temporary, cache_file)
+    return index
+
+
+def parse_page_ranges(spec: str, page_count: int) -> list[int]:
+    """'1-3,7,10-' to 0-based page indexes, in the given order."""
+    pages = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        first, dash, last = part.partition("-")
+        start = int(first) if first else 1
+        end = (int(last) if last else page_count) if dash else start
+        if not 1 <= start <= end <= page_count:
+            raise ValueError(f"Page range '{part}' outside 1-{page_count}")
+        pages.extend(range(start - 1, end))
+    return pages
+
+
+def write_pages(
+    document: PdfDocument, index: PageIndex, selected: list[int], output: Path
+) -> None:
+    """Write the selected pages, copying only the objects they reference.
+
+    References to other pages or to page tree nodes (links, annotation /P,
+    /Parent) become null so the rest of the document is not pulled in.
+    """
+    writer = PdfWriter()
+    catalog_ref = writer.reserve()
+    pages_ref = writer.reserve()
+    excluded = index.page_numbers | index.tree_nodes
+    mapping: dict[int, Ref] = {}
+    pending: list[int] = []
+
+    def translate(value: Any) -> Any:
+        if isinstance(value, Ref):
+            if value.num in excluded and value.num not in mapping:
+                return None
+            if value.num not in mapping:
+                if document.xref.get(value.num) is None:
+                    return None
+                mapping[value.num] = writer.reserve()
+                pending.append(value.num)
+            return mapping[value.num]
+        if isinstance(value, list):
+            return [translate(item) for item in value]
+        if isinstance(value, dict):
+            return {key: translate(item) for key, item in value.items()}
+        if isinstance(value, Stream):
+            return Stream(translate(value.dict), value.data)
+        return value
+
+    # Reserve every page first so links between selected pages are kept
+    kids = [writer.reserve() for _ in selected]
+    for page_index, new_ref in zip(selected, kids):
+        mapping[index.pages[page_index][0].num] = new_ref
+
+    for page_index, new_ref in zip(selected, kids):
+        ref, inherited = index.pages[page_index]
+        page = {
+            **inherited,
+            **{k: v for k, v in document.get(ref).items() if k != "Parent"},
+        }
+        page = translate(page)
+        page[Name("Parent")] = pages_ref
+        writer.set(new_ref, page)
+
+    while pending:
+        num = pending.pop()
+        writer.set(mapping[num], translate(document.get(num)))
+
+    writer.set(
+        pages_ref,
+        {Name("Type"): Name("Pages"), Name("Kids"): kids, Name("Count"): len(kids)},
+    )
+    writer.set(catalog_ref, {Name("Type"): Name("Catalog"), Name("Pages"): pages_ref})
+    with open(output, "wb") as f:
+        writer.write(f, catalog_ref)
+
+
+def extract_pages(
+    path: Path, spec: str, output: Path, index_dir: Path = DEFAULT_INDEX_DIR
+) -> int:
+    index = load_page_index(path, index_dir)
+    selected = parse_page_ranges(spec, len(index.pages))
+    with PdfDocument(path, xref=index.xref, trailer={Name("Root"): index.root}) as doc:
+        write_pages(doc, index, selected, output)
+    return len(selected)
+
+
+def split_pdf(
+    path: Path, every: int, output_dir: Path, index_dir: Path = DEFAULT_INDEX_DIR
+) -> list[Path]:
+    index = load_page_index(path, index_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    outputs = []
+    with PdfDocument(path, xref=index.xref, trailer={Name("Root"): index.root}) as doc:
+        for part, start in enumerate(range(0, len(index.pages), every), start=1):
+            output = output_dir / f"{path.stem}_part{part:03d}.pdf"
+            selected = list(range(start, min(start + every, len(index.pages))))
+            write_pages(doc, index, selected, output)
+            outputs.append(output)
+    return outputs
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Extract or split PDF pages")
+    parser.add_argument(
+        "--index-dir",
+        type=Path,
+        default=DEFAULT_INDEX_DIR,
+        help="cache of parsed page indexes (default: %(default)s)",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    extract_parser = subparsers.add_parser("extract", help="copy a set of pages")
+    extract_parser.add_argument("path", type=Path)
+    extract_parser.add_argument("pages", help="1-based ranges, e.g. 1-3,7,10-")
+    extract_parser.add_argument("-o", "--output", type=Path)
+
+    split_parser = subparsers.add_parser("split", help="cut into parts of N pages")
+    split_parser.add_argument("path", type=Path)
+    split_parser.add_argument("--every", type=int, default=1)
+    split_parser.add_argument("--output-dir", type=Path)
+
+    args = parser.parse_args(argv)
+
+    if not args.path.is_file():
+        print(f"Error: '{args.path}' is not a file")
+        return
+
+    try:
+        if args.command == "extract":
+            output = args.output or args.path.with_name(
+                f"{args.path.stem}_pages.pdf"
+            )
+            count = extract_pages(args.path, args.pages, output, args.index_dir)
+            print(f"{count} pages written to {output}")
+        else:
+            output_dir = args.output_dir or args.path.parent
+            outputs = split_pdf(args.path, args.every, output_dir, args.index_dir)
+            print(f"{len(outputs)} parts written to {output_dir}")
+    except (PdfError, ValueError) as e:
+        print(f"Error: {e}")
+
+
+if __name__ == "__main__":
+    main()
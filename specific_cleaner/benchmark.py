@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+
+import io
+import os
+import sys
+import json
+import time
+import random
+import uuid
+import shutil
+import argparse
+import builtins
+import platform
+import tempfile
+import contextlib
+import multiprocessing
+from datetime import datetime
+from pathlib import Path
+from typing import Callable
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+import date_organizer
+import doc_cleaner
+import extension_analyzer
+from file_index import walk_files
+from op_journal import Journal
+
+DEFAULT_OUTPUT = "bench_results.json"
+TOOLS = [
+    "doc_cleaner",
+    "doc_cleaner_journaled",
+    "date_organizer",
+    "extension_analyzer",
+]
+
+KEPT_EXTENSIONS = [".jpg", ".png", ".pdf", ".docx", ".mp4", ".txt", ""]
+REMOVED_EXTENSIONS = [".log", ".json", ".tmp", ".py", ".js", ".dll"]
+MTIME_SPREAD_DAYS = 3 * 365
+
+# Filesystem entry points counted while a phase runs
+COUNTED_CALLS = {
+    os: ["scandir", "stat", "lstat", "listdir", "mkdir", "rename", "unlink", "utime"],
+    shutil: ["copy2"],
+    builtins: ["open"],
+}
+
+
+def generate_tree(
+    root: Path,
+    files: int,
+    depth: int,
+    fanout: int,
+    collision_ratio: float,
+    uuid_ratio: float,
+    removed_ratio: float,
+    seed: int,
+) -> None:
+    """Create a synthetic tree of empty-ish files with spread-out mtimes.
+
+    collision_ratio of the files share a small pool of names so that
+    date_organizer has to resolve collisions; uuid_ratio get UUID names.
+    """
+    rng = random.Random(seed)
+    dirs = [root]
+    level = [root]
+    for _ in range(depth):
+        level = [parent / f"d{i}" for parent in level for i in range(fanout)]
+        dirs.extend(level)
+    for directory in dirs:
+        directory.mkdir(parents=True, exist_ok=True)
+
+    now = time.time()
+    collision_pool = [f"IMG_{i:04d}" for i in range(max(1, files // 1000))]
+    for n in range(files):
+        roll = rng.random()
+        if roll < uuid_ratio:
+            stem = str(uuid.UUID(int=rng.getrandbits(128))).upper()
+        elif roll < uuid_ratio + collision_ratio:
+            stem = rng.choice(collision_pool)
+        else:
+            stem = f"file_{n}"
+        if rng.random() < removed_ratio:
+            ext = rng.choice(REMOVED_EXTENSIONS)
+        else:
+            ext = rng.choice(KEPT_EXTENSIONS)
+
+        path = dirs[n % len(dirs)] / f"{stem}{ext}"
+        with open(path, "wb") as f:
+            f.write(b"\0" * rng.randint(0, 512))
+        mtime = now - rng.uniform(0, MTIME_SPREAD_DAYS * 86400)
+        os.utime(path, (mtime, mtime))
+
+
+class CallCounter:
+    """Counts calls to the filesystem functions in COUNTED_CALLS."""
+
+    def __init__(self) -> None:
+        self.counts: dict[str, int] = {}
+        self.originals: list[tuple[object, str, Callable]] = []
+
+    def __enter__(self) -> "CallCounter":
+        for module, names in COUNTED_CALLS.items():
+            for name in names:
+                original = getattr(module, name)
+                self.originals.append((module, name, original))
+                setattr(module, name, self._wrap(name, original))
+        return self
+
+    def __exit__(self, *exc) -> None:
+        for module, name, original in self.originals:
+            setattr(module, name, original)
+
+    def _wrap(self, name: str, original: Callable) -> Callable:
+        def counted(*args, **kwargs):
+            self.counts[name] = self.counts.get(name, 0) + 1
+            return original(*args, **kwargs)
+
+        return counted
+
+
+def _proc_io() -> dict[str, int]:
+    """Read/write syscall counters from /proc (Linux only)."""
+    try:
+        with open("/proc/self/io") as f:
+            fields = dict(line.split(": ") for line in f.read().splitlines())
+        return {"syscr": int(fields["syscr"]), "syscw": int(fields["syscw"])}
+    except (OSError, KeyError, ValueError):
+        return {}
+
+
+def _peak_rss_kb() -> int | None:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def run_phase(name: str, func: Callable, results: dict):
+    io_before = _proc_io()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        with CallCounter() as counter:
+            start = time.perf_counter()
+            value = func()
+            elapsed = time.perf_counter() - start
+    io_after = _proc_io()
+    results[name] = {
+        "seconds": round(elapsed, 4),
+        "fs_calls": counter.counts,
+        **{k: io_after[k] - io_before[k] for k in io_after},
+    }
+    return value
+
+
+def _classify_doc_files(root: Path, results: dict) -> list[tuple[Path, str]]:
+    records = run_phase("scan", lambda: list(walk_files(root)), results)
+
+    def classify() -> list[tuple[Path, str]]:
+        doomed = []
+        for record in records:
+            path = Path(record.path)
+            reason = doc_cleaner.get_removal_reason(path)
+            if reason is not None:
+                doomed.append((path, reason))
+        return doomed
+
+    return run_phase("classify", classify, results)
+
+
+def bench_doc_cleaner(root: Path, results: dict) -> None:
+    doomed = _classify_doc_files(root, results)
+    run_phase(
+        "act",
+        lambda: [doc_cleaner._remove_file(path, reason) for path, reason in doomed],
+        results,
+    )
+
+
+def bench_doc_cleaner_journaled(root: Path, results: dict) -> None:
+    """The --journal path: batched, fsynced plans and moves into the trash."""
+    root = root.resolve()
+    doomed = _classify_doc_files(root, results)
+
+    def act() -> None:
+        journal = Journal(root.parent / f"{root.name}.journal.jsonl")
+        try:
+            remover = doc_cleaner.JournaledRemover(root, journal)
+            for path, reason in doomed:
+                remover.add(path, reason)
+            remover.flush()
+            journal.complete()
+        finally:
+            journal.close()
+
+    run_phase("act", act, results)
+
+
+def bench_date_organizer(root: Path, results: dict) -> None:
+    records = run_phase("scan", lambda: date_organizer.scan_files(root), results)
+    moves = run_phase(
+        "classify", lambda: date_organizer.plan_records(root, records), results
+    )
+    run_phase("act", lambda: date_organizer.execute_moves(root, moves), results)
+
+
+def bench_extension_analyzer(root: Path, results: dict) -> None:
+    records = run_phase("scan", lambda: list(walk_files(root)), results)
+    stats = run_phase(
+        "classify",
+        lambda: extension_analyzer.ScanStats(root).add_all(records),
+        results,
+    )
+    run_phase(
+        "act", lambda: extension_analyzer.write_json(stats, io.StringIO()), results
+    )
+
+
+BENCHMARKS = {
+    "doc_cleaner": bench_doc_cleaner,
+    "doc_cleaner_journaled": bench_doc_cleaner_journaled,
+    "date_organizer": bench_date_organizer,
+    "extension_analyzer": bench_extension_analyzer,
+}
+
+
+def _bench_child(tool: str, root: str) -> dict:
+    phases: dict = {}
+    BENCHMARKS[tool](Path(root), phases)
+    return {"phases": phases, "peak_rss_kb": _peak_rss_kb()}
+
+
+def bench_tool(tool: str, tree_args: dict, workdir: Path) -> dict:
+    """Generate a fresh tree and benchmark one tool in its own process."""
+    root = workdir / tool
+    start = time.perf_counter()
+    generate_tree(root, **tree_args)
+    generate_seconds = time.perf_counter() - start
+
+    # A fresh process per tool keeps peak RSS attributable to that tool
+    with multiprocessing.Pool(1) as pool:
+        result = pool.apply(_bench_child, (tool, str(root)))
+    shutil.rmtree(root, ignore_errors=True)
+
+    result["generate_seconds"] = round(generate_seconds, 4)
+    return result
+
+
+def run_benchmarks(
+    file_counts: list[int], tools: list[str], tree_args: dict, workdir: str | None
+) -> dict:
+    run = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "tree": tree_args,
+        "results": [],
+    }
+    with tempfile.TemporaryDirectory(prefix="toolbox_bench_", dir=workdir) as tmp:
+        for files in file_counts:
+            for tool in tools:
+                print(f"Benchmarking {tool} on {files} files...")
+                result = bench_tool(tool, {**tree_args, "files": files}, Path(tmp))
+                run["results"].append({"tool": tool, "files": files, **result})
+                phases = result["phases"]
+                print(
+                    "  "
+                    + "  ".join(f"{p}={phases[p]['seconds']:.3f}s" for p in phases)
+                    + f"  peak_rss={result['peak_rss_kb']} KB"
+                )
+    return run
+
+
+def append_results(output: str, run: dict) -> None:
+    """Keep every run in one JSON list so results can be compared over time."""
+    output_path = Path(output)
+    runs = []
+    if output_path.exists():
+        with open(output_path, "r", encoding="utf-8") as f:
+            runs = json.load(f)
+    runs.append(run)
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(runs, f, indent=2)
+    print(f"\nResults appended to {output_path}")
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Benchmark the specific_cleaner tools on synthetic trees"
+    )
+    parser.add_argument(
+        "--files", type=int, nargs="+", default=[10_000], help="file counts to test"
+    )
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--fanout", type=int, default=8)
+    parser.add_argument("--collision-ratio", type=float, default=0.2)
+    parser.add_argument("--uuid-ratio", type=float, default=0.05)
+    parser.add_argument("--removed-ratio", type=float, default=0.3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--tools", nargs="+", choices=TOOLS, default=TOOLS)
+    parser.add_argument("--workdir", help="where to create the temporary trees")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    args = parser.parse_args(argv)
+
+    tree_args = {
+        "depth": args.depth,
+        "fanout": args.fanout,
+        "collision_ratio": args.collision_ratio,
+        "uuid_ratio": args.uuid_ratio,
+        "removed_ratio": args.removed_ratio,
+        "seed": args.seed,
+    }
+    run = run_benchmarks(args.files, args.tools, tree_args, args.workdir)
+    append_results(args.output, run)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+
+import struct
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import BinaryIO
+
+from file_index import DEFAULT_INDEX_PATH, FileRecord
+
+EXIF_SUFFIXES = {
+    ".jpg",
+    ".jpeg",
+    ".tif",
+    ".tiff",
+    ".cr2",
+    ".nef",
+    ".arw",
+    ".dng",
+    ".orf",
+    ".rw2",
+    ".pef",
+}
+ISOBMFF_SUFFIXES = {".mp4", ".mov", ".m4v", ".3gp"}
+MEDIA_SUFFIXES = EXIF_SUFFIXES | ISOBMFF_SUFFIXES
+
+EXIF_IFD_POINTER = 0x8769
+DATE_TIME_ORIGINAL = 0x9003
+DATE_TIME_DIGITIZED = 0x9004
+TIFF_MAGICS = {42, 0x4F52, 0x55}  # TIFF, Olympus ORF, Panasonic RW2
+MAX_IFD_ENTRIES = 1024
+MP4_EPOCH = datetime(1904, 1, 1, tzinfo=timezone.utc)
+
+READ_WORKERS = 16
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS capture_dates (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    captured_at TEXT
+)
+"""
+
+
+def _parse_exif_date(raw: bytes) -> datetime | None:
+    try:
+        return datetime.strptime(
+            raw.split(b"\0", 1)[0].decode("ascii"), "%Y:%m:%d %H:%M:%S"
+        )
+    except (UnicodeDecodeError, ValueError):
+        return None
+
+
+def _read_ifd(f: BinaryIO, base: int, offset: int, endian: str) -> dict[int, tuple]:
+    """Return {tag: (type, count, raw value field)} for one IFD."""
+    f.seek(base + offset)
+    (count,) = struct.unpack(endian + "H", f.read(2))
+    entries = {}
+    for _ in range(min(count, MAX_IFD_ENTRIES)):
+        chunk = f.read(12)
+        if len(chunk) < 12:
+            break
+        tag, kind, n = struct.unpack(endian + "HHI", chunk[:8])
+        entries[tag] = (kind, n, chunk[8:])
+    return entries
+
+
+def _read_tiff_date(f: BinaryIO, base: int) -> datetime | None:
+    f.seek(base)
+    header = f.read(8)
+    if len(header) < 8 or header[:2] not in (b"II", b"MM"):
+        return None
+    endian = "<" if header[:2] == b"II" else ">"
+    magic, ifd0 = struct.unpack(endian + "HI", header[2:])
+    if magic not in TIFF_MAGICS:
+        return None
+
+    pointer = _read_ifd(f, base, ifd0, endian).get(EXIF_IFD_POINTER)
+    if pointer is None:
+        return None
+    (exif_offset,) = struct.unpack(endian + "I", pointer[2])
+    exif = _read_ifd(f, base, exif_offset, endian)
+
+    for tag in (DATE_TIME_ORIGINAL, DATE_TIME_DIGITIZED):
+        if tag in exif:
+            _, n, value = exif[tag]
+            (offset,) = struct.unpack(endian + "I", value)
+            f.seek(base + offset)
+            date = _parse_exif_date(f.read(n))
+            if date:
+                return date
+    return None
+
+
+def _read_jpeg_date(f: BinaryIO) -> datetime | None:
+    """Walk JPEG segments up to the first APP1 Exif block, skipping image data."""
+    f.seek(2)
+    while True:
+        marker = f.read(4)
+        if len(marker) < 4 or marker[0] != 0xFF or marker[1] == 0xDA:
+            return None
+        (length,) = struct.unpack(">H", marker[2:])
+        segment_start = f.tell()
+        if marker[1] == 0xE1 and f.read(6) == b"Exif\0\0":
+            return _read_tiff_date(f, segment_start + 6)
+        f.seek(segment_start + length - 2)
+
+
+def _iter_boxes(f: BinaryIO, start: int, end: int | None):
+    position = start
+    while end is None or position + 8 <= end:
+        f.seek(position)
+        header = f.read(8)
+        if len(header) < 8:
+            return
+        size, kind = struct.unpack(">I4s", header)
+        header_size = 8
+        if size == 1:
+            (size,) = struct.unpack(">Q", f.read(8))
+            header_size = 16
+        elif size == 0:
+            yield kind, position + header_size, end
+            return
+        if size < header_size:
+            return
+        yield kind, position + header_size, position + size
+        position += size
+
+
+def _read_isobmff_date(f: BinaryIO) -> datetime | None:
+    """Read moov/mvhd creation_time, seeking over media data boxes."""
+    for kind, body, end in _iter_boxes(f, 0, None):
+        if kind != b"moov":
+            continue
+        for child, child_body, _ in _iter_boxes(f, body, end):
+            if child != b"mvhd":
+                continue
+            f.seek(child_body)
+            version = f.read(4)[0]
+            if version == 1:
+                (seconds,) = struct.unpack(">Q", f.read(8))
+            else:
+                (seconds,) = struct.unpack(">I", f.read(4))
+            if seconds == 0:
+                return None
+            created = MP4_EPOCH + timedelta(seconds=seconds)
+            return created.astimezone().replace(tzinfo=None)
+        return None
+    return None
+
+
+def _parse_capture_date(path: str) -> datetime | None:
+    """read_capture_date, letting OSError through: a failed read is no answer."""
+    if Path(path).suffix.lower() not in MEDIA_SUFFIXES:
+        return None
+    with open(path, "rb") as f:
+        try:
+            magic = f.read(12)
+            if magic[:2] == b"\xff\xd8":
+                return _read_jpeg_date(f)
+            if magic[:2] in (b"II", b"MM"):
+                return _read_tiff_date(f, 0)
+            if magic[4:8] == b"ftyp":
+                return _read_isobmff_date(f)
+        except (struct.error, IndexError, OverflowError):
+            return None  # malformed or truncated header
+    return None
+
+
+def read_capture_date(path: str) -> datetime | None:
+    """Return the EXIF DateTimeOriginal or container creation date of a file.
+
+    Only headers are read; None means the file has no usable capture date.
+    """
+    try:
+        return _parse_capture_date(path)
+    except OSError:
+        return None
+
+
+def _try_capture_date(path: str) -> tuple[bool, datetime | None]:
+    """(parsed, date); parsed is False when the file could not be read."""
+    try:
+        return True, _parse_capture_date(path)
+    except OSError as e:
+        print(f"Error reading {path}: {e}")
+        return False, None
+
+
+class CaptureDateCache:
+    """Capture dates keyed by (path, size, mtime), stored next to the file index."""
+
+    def __init__(self, db_path: str | Path = DEFAULT_INDEX_PATH) -> None:
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute(SCHEMA)
+
+    def __enter__(self) -> "CaptureDateCache":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.conn.commit()
+        self.conn.close()
+
+    def get(self, record: FileRecord) -> tuple[bool, datetime | None]:
+        row = self.conn.execute(
+            "SELECT captured_at FROM capture_dates"
+            " WHERE path = ? AND size = ? AND mtime_ns = ?",
+            (record.path, record.size, record.mtime_ns),
+        ).fetchone()
+        if row is None:
+            return False, None
+        return True, datetime.fromisoformat(row[0]) if row[0] else None
+
+    def put_many(self, items: list[tuple[FileRecord, datetime | None]]) -> None:
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO capture_dates VALUES (?, ?, ?, ?)",
+            [
+                (r.path, r.size, r.mtime_ns, date.isoformat() if date else None)
+                for r, date in items
+            ],
+        )
+        self.conn.commit()
+
+
+def capture_dates(
+    records: list[FileRecord], index_path: str | Path = DEFAULT_INDEX_PATH
+) -> dict[str, datetime | None]:
+    """Resolve capture dates, parsing headers in parallel only for uncached files.
+
+    Files that are not photos or videos are left out of the result.
+    """
+    dates: dict[str, datetime | None] = {}
+    with CaptureDateCache(index_path) as cache:
+        missing = []
+        for record in records:
+            if record.suffix.lower() not in MEDIA_SUFFIXES:
+                continue
+            hit, date = cache.get(record)
+            if hit:
+                dates[record.path] = date
+            else:
+                missing.append(record)
+
+        with ThreadPoolExecutor(max_workers=READ_WORKERS) as pool:
+            results = list(pool.map(_try_capture_date, (r.path for r in missing)))
+        # Read errors (permissions, a file still being copied) are retried next run
+        cache.put_many(
+            [(r, date) for r, (parsed, date) in zip(missing, results) if parsed]
+        )
+        dates.update((r.path, date) for r, (_, date) in zip(missing, results))
+    return dates
@@ -1,75 +1,259 @@
 #!/usr/bin/env python3
 
-import sys
+import os
+import argparse
 import shutil
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
 from pathlib import Path
 from datetime import datetime
 
+from capture_date import capture_dates
+from file_index import DEFAULT_INDEX_PATH, FileRecord, walk_files
+from fs_watch import (
+    DEFAULT_DEBOUNCE,
+    DEFAULT_RECONCILE_INTERVAL,
+    add_watch_arguments,
+    stat_records,
+    watch_tree,
+)
+from op_journal import Journal
+
 DATE_FOLDER_FORMAT = "%Y-%m"
+SKIPPED_DIR_NAMES = {"$RECYCLE.BIN"}
+COPY_WORKERS = 8
 
 
-def organize_files_by_date(path: str) -> None:
-    target_path = Path(path)
+@dataclass(frozen=True)
+class PlannedMove:
+    source: Path
+    dest: Path
 
-    if not target_path.exists():
-        print(f"Error: Path '{path}' does not exist")
-        return
+    @property
+    def date_folder(self) -> str:
+        return self.dest.parent.name
 
-    if not target_path.is_dir():
-        print(f"Error: '{path}' is not a directory")
-        return
 
+def is_date_folder(name: str) -> bool:
+    try:
+        datetime.strptime(name, DATE_FOLDER_FORMAT)
+    except ValueError:
+        return False
+    return True
+
+
+class DestinationPlanner:
+    """Assigns collision-free destination names without touching the disk per file.
+
+    Each month folder is listed once; later collisions are resolved in memory.
+    """
+
+    def __init__(self, target_path: Path) -> None:
+        self.target_path = target_path
+        self.taken: dict[str, set[str]] = {}
+        self.next_suffix: dict[tuple[str, str], int] = {}
+
+    def _names_in(self, date_folder: str) -> set[str]:
+        names = self.taken.get(date_folder)
+        if names is None:
+            try:
+                names = set(os.listdir(self.target_path / date_folder))
+            except FileNotFoundError:
+                names = set()
+            self.taken[date_folder] = names
+        return names
+
+    def assign(self, source: Path, date_folder: str) -> Path:
+        names = self._names_in(date_folder)
+        name = source.name
+        if name in names:
+            base_name = source.stem
+            suffix = source.suffix
+            counter = self.next_suffix.get((date_folder, name), 1)
+            while name in names:
+                name = f"{base_name}_{counter}{suffix}"
+                counter += 1
+            self.next_suffix[(date_folder, source.name)] = counter
+        names.add(name)
+        return self.target_path / date_folder / name
+
+
+def is_skipped_dir(target_path: Path, path: str) -> bool:
+    """Month folders and the recycle bin at the top of the tree are left alone."""
+    name = os.path.basename(path)
+    return os.path.dirname(path) == str(target_path) and (
+        name in SKIPPED_DIR_NAMES or is_date_folder(name)
+    )
+
+
+def scan_files(target_path: Path) -> list[FileRecord]:
+    """List files to organize, skipping existing month folders and the recycle bin."""
+    target_path = target_path.resolve()
+    skip_dirs = set()
+    for item in target_path.iterdir():
+        if item.is_dir() and is_skipped_dir(target_path, str(item)):
+            skip_dirs.add(str(item))
+    return list(walk_files(target_path, skip_dirs))
+
+
+def plan_records(
+    target_path: Path,
+    records: list[FileRecord],
+    use_capture_date: bool = False,
+    index_path: str | Path = DEFAULT_INDEX_PATH,
+) -> list[PlannedMove]:
+    """Compute every move before anything is touched.
+
+    With use_capture_date, photos and videos are sorted by their EXIF or
+    container date and everything else falls back to the modification time.
+    """
+    captured = capture_dates(records, index_path) if use_capture_date else {}
+
+    planner = DestinationPlanner(target_path.resolve())
+    moves = []
+    for record in records:
+        source = Path(record.path)
+        file_date = captured.get(record.path) or datetime.fromtimestamp(record.mtime)
+        date_folder = file_date.strftime(DATE_FOLDER_FORMAT)
+        moves.append(PlannedMove(source, planner.assign(source, date_folder)))
+    return moves
+
+
+def plan_moves(
+    target_path: Path,
+    use_capture_date: bool = False,
+    index_path: str | Path = DEFAULT_INDEX_PATH,
+) -> list[PlannedMove]:
+    """Scan the tree once and plan every move."""
+    records = scan_files(target_path)
+    return plan_records(target_path, records, use_capture_date, index_path)
+
+
+def _copy_then_delete(move: PlannedMove) -> None:
+    shutil.copy2(move.source, move.dest)
+    os.unlink(move.source)
+
+
+def execute_moves(
+    target_path: Path, moves: list[PlannedMove], journal: Journal | None = None
+) -> tuple[int, int]:
+    """Apply planned moves, renaming in place and copying only across devices."""
+    target_path = target_path.resolve()
     moved_count = 0
     error_count = 0
 
-    # Get all existing date directories to avoid moving them
-    existing_date_dirs = set()
-    for item in target_path.iterdir():
-        if item.is_dir() and len(item.name) == 10 and item.name.count("-") == 2:
-            try:
-                datetime.strptime(item.name, DATE_FOLDER_FORMAT)
-                existing_date_dirs.add(item.name)
-            except ValueError:
-                pass
-
-    # Process all files recursively
-    for file_path in target_path.rglob("*"):
-        if file_path.is_file():
-            # Skip files that are already in date directories at root level
-            relative_parts = file_path.relative_to(target_path).parts
-            if len(relative_parts) > 1 and relative_parts[0] in existing_date_dirs:
-                continue
+    def report(move: PlannedMove, error: OSError | None) -> None:
+        nonlocal moved_count, error_count
+        relative_path = move.source.relative_to(target_path)
+        if error is None:
+            print(f"Moved: {relative_path} -> {move.date_folder}/")
+            moved_count += 1
+            if journal:
+                journal.done(move.source)
+        else:
+            print(f"Error moving {relative_path}: {error}")
+            error_count += 1
 
-            # Skip files in $RECYCLE.BIN directories
-            if len(relative_parts) > 1 and relative_parts[0] == "$RECYCLE.BIN":
+    for date_folder in {move.date_folder for move in moves}:
+        (target_path / date_folder).mkdir(exist_ok=True)
+    target_dev = target_path.stat().st_dev
+
+    source_devs: dict[Path, int] = {}
+    cross_device = []
+    for move in moves:
+        parent = move.source.parent
+        try:
+            if parent not in source_devs:
+                source_devs[parent] = parent.stat().st_dev
+            if source_devs[parent] != target_dev:
+                cross_device.append(move)
                 continue
+            os.rename(move.source, move.dest)
+        except OSError as e:
+            report(move, e)
+        else:
+            report(move, None)
 
-            try:
-                mod_time = datetime.fromtimestamp(file_path.stat().st_mtime)
-                date_folder = mod_time.strftime(DATE_FOLDER_FORMAT)
+    if cross_device:
+        with ThreadPoolExecutor(max_workers=COPY_WORKERS) as pool:
+            futures = {
+                pool.submit(_copy_then_delete, move): move for move in cross_device
+            }
+            for future in as_completed(futures):
+                report(futures[future], future.exception())
+
+    return moved_count, error_count
+
+
+def resume_moves(journal: Journal) -> list[PlannedMove]:
+    """Rebuild the unfinished part of an interrupted plan without rescanning."""
+    moves = []
+    for src, dst in list(journal.pending.items()):
+        if os.path.exists(src):
+            moves.append(PlannedMove(Path(src), Path(dst)))
+        elif os.path.exists(dst):
+            journal.done(src)  # moved before its done record was synced
+    return moves
+
+
+def apply_moves(
+    target_path: Path, moves: list[PlannedMove], journal: Journal | None
+) -> tuple[int, int]:
+    """Journal the plan (when journaling), then execute it."""
+    if journal:
+        for move in moves:
+            journal.plan("move", move.source, move.dest)
+        journal.sync()
+    counts = execute_moves(target_path, moves, journal)
+    if journal:
+        journal.complete()
+    return counts
+
+
+def _organize(
+    target_path: Path,
+    journal: Journal | None,
+    use_capture_date: bool,
+    index_path: str | Path,
+) -> tuple[int, int]:
+    if journal and journal.pending:
+        print(f"Resuming {len(journal.pending)} planned moves from {journal.path}")
+        moves = resume_moves(journal)
+        counts = execute_moves(target_path, moves, journal)
+        journal.complete()
+        return counts
+    moves = plan_moves(target_path, use_capture_date, index_path)
+    return apply_moves(target_path, moves, journal)
 
-                dest_dir = target_path / date_folder
-                dest_dir.mkdir(exist_ok=True)
 
-                dest_file = dest_dir / file_path.name
+def _check_directory(target_path: Path) -> bool:
+    if not target_path.exists():
+        print(f"Error: Path '{target_path}' does not exist")
+        return False
+    if not target_path.is_dir():
+        print(f"Error: '{target_path}' is not a directory")
+        return False
+    return True
 
-                if dest_file.exists():
-                    base_name = file_path.stem
-                    suffix = file_path.suffix
-                    counter = 1
-                    while dest_file.exists():
-                        dest_file = dest_dir / f"{base_name}_{counter}{suffix}"
-                        counter += 1
 
-                shutil.move(str(file_path), str(dest_file))
-                relative_path = file_path.relative_to(target_path)
-                print(f"Moved: {relative_path} -> {date_folder}/")
-                moved_count += 1
+def organize_files_by_date(
+    path: str,
+    journal_path: str | None = None,
+    use_capture_date: bool = False,
+    index_path: str | Path = DEFAULT_INDEX_PATH,
+) -> None:
+    target_path = Path(path)
+    if not _check_directory(target_path):
+        return
 
-            except OSError as e:
-                relative_path = file_path.relative_to(target_path)
-                print(f"Error moving {relative_path}: {e}")
-                error_count += 1
+    journal = Journal(journal_path) if journal_path else None
+    try:
+        moved_count, error_count = _organize(
+            target_path, journal, use_capture_date, index_path
+        )
+    finally:
+        if journal:
+            journal.close()
 
     print("\nOrganization complete.")
     print(f"Files moved: {moved_count}")
@@ -77,13 +261,87 @@ def organize_files_by_date(path: str) -> None:
         print(f"Errors: {error_count}")
 
 
-def main():
-    if len(sys.argv) != 2:
-        print("Usage: python date_organizer.py <path>")
-        sys.exit(1)
+def watch_files_by_date(
+    path: str,
+    journal_path: str | None = None,
+    use_capture_date: bool = False,
+    index_path: str | Path = DEFAULT_INDEX_PATH,
+    debounce: float = DEFAULT_DEBOUNCE,
+    reconcile_interval: float = DEFAULT_RECONCILE_INTERVAL,
+) -> None:
+    """Organize the tree, then each batch of new or changed files as it settles."""
+    target_path = Path(path)
+    if not _check_directory(target_path):
+        return
+    target_path = target_path.resolve()
+
+    journal = Journal(journal_path) if journal_path else None
 
-    path = sys.argv[1]
-    organize_files_by_date(path)
+    def handle_batch(paths: list[str]) -> None:
+        # Month folders are not watched, so every path is still to organize
+        records = stat_records(paths)
+        if records:
+            moves = plan_records(target_path, records, use_capture_date, index_path)
+            apply_moves(target_path, moves, journal)
+
+    def reconcile() -> None:
+        moved_count, error_count = _organize(
+            target_path, journal, use_capture_date, index_path
+        )
+        print(f"Full scan: {moved_count} files moved, {error_count} errors")
+
+    print(f"Watching {target_path} (Ctrl+C to stop)")
+    try:
+        watch_tree(
+            target_path,
+            handle_batch,
+            reconcile,
+            skip_dir=lambda path: is_skipped_dir(target_path, path),
+            debounce=debounce,
+            reconcile_interval=reconcile_interval,
+        )
+    except KeyboardInterrupt:
+        print("\nStopped watching.")
+    except OSError as e:
+        print(f"Error: {e}")
+    finally:
+        if journal:
+            journal.close()
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Move files into YYYY-MM folders")
+    parser.add_argument("path")
+    parser.add_argument(
+        "--journal",
+        help="operation journal used to resume an interrupted run "
+        "(undo with: python op_journal.py undo <journal>)",
+    )
+    parser.add_argument(
+        "--capture-date",
+        action="store_true",
+        help="sort photos and videos by EXIF DateTimeOriginal or container "
+        "creation date instead of modification time",
+    )
+    parser.add_argument(
+        "--index",
+        default=str(DEFAULT_INDEX_PATH),
+        help="SQLite cache for extracted capture dates (default: %(default)s)",
+    )
+    add_watch_arguments(parser)
+    args = parser.parse_args(argv)
+
+    if args.watch:
+        watch_files_by_date(
+            args.path,
+            args.journal,
+            args.capture_date,
+            args.index,
+            args.debounce,
+            args.reconcile_every,
+        )
+        return
+    organize_files_by_date(args.path, args.journal, args.capture_date, args.index)
 
 
 if __name__ == "__main__":
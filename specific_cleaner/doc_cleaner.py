@@ -1,11 +1,24 @@
 #!/usr/bin/env python3
 
 import os
-import sys
+import argparse
 import re
 from pathlib import Path
 import fnmatch
 
+from file_index import walk_files
+from fs_watch import (
+    DEFAULT_DEBOUNCE,
+    DEFAULT_RECONCILE_INTERVAL,
+    add_watch_arguments,
+    stat_records,
+    watch_tree,
+)
+from op_journal import Journal, move_file
+
+TRASH_DIR_NAME = ".toolbox_trash"
+JOURNAL_BATCH_SIZE = 1000
+
 
 DOC_EXTENSIONS = [
     ".adx",
@@ -110,6 +123,9 @@ PROGRAMMING_EXTENSIONS = [
 ]
 
 
+ALL_EXTENSIONS = DOC_EXTENSIONS + PROGRAMMING_EXTENSIONS
+
+
 def matches_extension(file_extension: str, extension_patterns: list[str]) -> bool:
     """Check if file extension matches any pattern in the list, supporting wildcards."""
     for pattern in extension_patterns:
@@ -135,54 +151,228 @@ def should_remove_uuid_file(file_path: Path) -> bool:
     return True
 
 
-def clean_doc_files(path: str) -> None:
-    target_path = Path(path)
+def get_removal_reason(file_path: Path) -> str | None:
+    """Return why a file should be removed, or None to keep it."""
+    # Check if file has matching extension
+    if matches_extension(file_path.suffix.lower(), ALL_EXTENSIONS):
+        return f"extension {file_path.suffix.lower()}"
+    # Check if file has UUID pattern and remove it
+    if contains_uuid_pattern(file_path.name) and should_remove_uuid_file(file_path):
+        return "UUID pattern file"
+    return None
 
-    if not target_path.exists():
-        print(f"Error: Path '{path}' does not exist")
-        return
 
-    if not target_path.is_dir():
-        print(f"Error: '{path}' is not a directory")
-        return
+class JournaledRemover:
+    """Moves files into a trash folder in journaled batches.
 
-    removed_count = 0
+    Each batch of plans is fsynced before any file is touched, and finished
+    directories are checkpointed only after their batch ran, so an interrupted
+    run can resume without rescanning them and the journal can be undone.
+    """
+
+    def __init__(self, target_path: Path, journal: Journal) -> None:
+        self.target_path = target_path
+        self.trash_path = target_path / TRASH_DIR_NAME
+        self.journal = journal
+        self.batch: list[tuple[Path, str]] = []
+        self.finished_dirs: list[str] = []
+        self.created_dirs: set[Path] = set()
+        self.assigned: set[Path] = set()
+        self.removed_count = 0
 
-    all_extensions = DOC_EXTENSIONS + PROGRAMMING_EXTENSIONS
+    def add(self, file_path: Path, reason: str) -> None:
+        self.batch.append((file_path, reason))
+        if len(self.batch) >= JOURNAL_BATCH_SIZE:
+            self.flush()
 
-    for file_path in target_path.rglob("*"):
-        should_remove = False
-        removal_reason = ""
+    def dir_done(self, path: str) -> None:
+        self.finished_dirs.append(path)
 
-        if file_path.is_file():
-            # Check if file has matching extension
-            if matches_extension(file_path.suffix.lower(), all_extensions):
-                should_remove = True
-                removal_reason = f"extension {file_path.suffix.lower()}"
-            # Check if file has UUID pattern and remove it
-            elif contains_uuid_pattern(file_path.name):
-                should_remove = should_remove_uuid_file(file_path)
-                if should_remove:
-                    removal_reason = "UUID pattern file"
+    def _trash_path_for(self, file_path: Path) -> Path:
+        """Mirror the file's path in the trash, numbered if trashed before."""
+        dest = self.trash_path / file_path.relative_to(self.target_path)
+        candidate = dest
+        counter = 1
+        while candidate in self.assigned or os.path.lexists(candidate):
+            candidate = dest.with_name(f"{dest.stem}_{counter}{dest.suffix}")
+            counter += 1
+        self.assigned.add(candidate)
+        return candidate
 
-        if should_remove:
+    def flush(self) -> None:
+        planned = []
+        for file_path, reason in self.batch:
+            dest = self._trash_path_for(file_path)
+            self.journal.plan("delete", file_path, dest)
+            planned.append((file_path, reason, dest))
+        self.journal.sync()
+
+        for file_path, reason, dest in planned:
             try:
-                file_path.unlink()
-                print(f"Removed: {file_path} ({removal_reason})")
-                removed_count += 1
+                if dest.parent not in self.created_dirs:
+                    dest.parent.mkdir(parents=True, exist_ok=True)
+                    self.created_dirs.add(dest.parent)
+                move_file(file_path, dest)
+                self.journal.done(file_path)
+                print(f"Removed: {file_path} ({reason})")
+                self.removed_count += 1
             except OSError as e:
                 print(f"Error removing {file_path}: {e}")
+        self.batch.clear()
+
+        for path in self.finished_dirs:
+            self.journal.dir_done(path)
+        self.finished_dirs.clear()
+
+
+def _check_directory(target_path: Path) -> bool:
+    if not target_path.exists():
+        print(f"Error: Path '{target_path}' does not exist")
+        return False
+    if not target_path.is_dir():
+        print(f"Error: '{target_path}' is not a directory")
+        return False
+    return True
+
+
+def _remove_file(file_path: Path, reason: str) -> bool:
+    try:
+        file_path.unlink()
+    except OSError as e:
+        print(f"Error removing {file_path}: {e}")
+        return False
+    print(f"Removed: {file_path} ({reason})")
+    return True
+
+
+def clean_doc_files(path: str, journal_path: str | None = None) -> None:
+    target_path = Path(path)
+    if not _check_directory(target_path):
+        return
+
+    target_path = target_path.resolve()
+    if journal_path:
+        journal = Journal(journal_path)
+        try:
+            removed_count = _clean_journaled(target_path, journal)
+        finally:
+            journal.close()
+    else:
+        removed_count = _clean(target_path)
 
     print(f"\nCleaning complete. Removed {removed_count} document files.")
 
 
-def main():
-    if len(sys.argv) != 2:
-        print("Usage: python doc_cleaner.py <path>")
-        sys.exit(1)
+def _clean(target_path: Path) -> int:
+    removed_count = 0
+    # Files in the trash are only removed by deleting it after a journaled run
+    for record in walk_files(target_path, {str(target_path / TRASH_DIR_NAME)}):
+        file_path = Path(record.path)
+        removal_reason = get_removal_reason(file_path)
+        if removal_reason is not None and _remove_file(file_path, removal_reason):
+            removed_count += 1
+    return removed_count
+
+
+def _clean_journaled(target_path: Path, journal: Journal) -> int:
+    remover = JournaledRemover(target_path, journal)
+
+    if journal.resumable:
+        print(
+            f"Resuming from {journal.path}: "
+            f"skipping {len(journal.done_dirs)} finished directories"
+        )
+        for src in list(journal.pending):
+            if os.path.exists(src):
+                reason = get_removal_reason(Path(src))
+                if reason:
+                    remover.add(Path(src), reason)
+            elif os.path.exists(journal.pending[src]):
+                journal.done(src)  # moved before its done record was synced
+        remover.flush()
+
+    skip_dirs = set(journal.done_dirs) | {str(remover.trash_path)}
+    for record in walk_files(target_path, skip_dirs, remover.dir_done):
+        file_path = Path(record.path)
+        removal_reason = get_removal_reason(file_path)
+        if removal_reason is not None:
+            remover.add(file_path, removal_reason)
+    remover.flush()
+    journal.complete()
+    return remover.removed_count
+
+
+def watch_doc_files(
+    path: str,
+    journal_path: str | None = None,
+    debounce: float = DEFAULT_DEBOUNCE,
+    reconcile_interval: float = DEFAULT_RECONCILE_INTERVAL,
+) -> None:
+    """Clean the tree, then each batch of new or changed files as it settles."""
+    target_path = Path(path)
+    if not _check_directory(target_path):
+        return
+    target_path = target_path.resolve()
+    trash_path = str(target_path / TRASH_DIR_NAME)
+
+    journal = Journal(journal_path) if journal_path else None
+
+    def handle_batch(paths: list[str]) -> None:
+        remover = JournaledRemover(target_path, journal) if journal else None
+        for record in stat_records(paths):
+            file_path = Path(record.path)
+            removal_reason = get_removal_reason(file_path)
+            if removal_reason is None:
+                continue
+            if remover:
+                remover.add(file_path, removal_reason)
+            else:
+                _remove_file(file_path, removal_reason)
+        if remover:
+            remover.flush()
+            journal.complete()
+
+    def reconcile() -> None:
+        if journal:
+            removed_count = _clean_journaled(target_path, journal)
+        else:
+            removed_count = _clean(target_path)
+        print(f"Full scan: removed {removed_count} document files")
 
-    path = sys.argv[1]
-    clean_doc_files(path)
+    print(f"Watching {target_path} (Ctrl+C to stop)")
+    try:
+        watch_tree(
+            target_path,
+            handle_batch,
+            reconcile,
+            skip_dir=lambda path: path == trash_path,
+            debounce=debounce,
+            reconcile_interval=reconcile_interval,
+        )
+    except KeyboardInterrupt:
+        print("\nStopped watching.")
+    except OSError as e:
+        print(f"Error: {e}")
+    finally:
+        if journal:
+            journal.close()
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Remove document and code files")
+    parser.add_argument("path")
+    parser.add_argument(
+        "--journal",
+        help=f"move files to {TRASH_DIR_NAME}/ and journal them so an interrupted "
+        "run can resume (undo with: python op_journal.py undo <journal>)",
+    )
+    add_watch_arguments(parser)
+    args = parser.parse_args(argv)
+
+    if args.watch:
+        watch_doc_files(args.path, args.journal, args.debounce, args.reconcile_every)
+        return
+    clean_doc_files(args.path, args.journal)
 
 
 if __name__ == "__main__":
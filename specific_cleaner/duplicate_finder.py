@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+
+import argparse
+from collections import defaultdict
+from pathlib import Path
+
+from file_index import DEFAULT_INDEX_PATH, FileIndex, FileRecord
+
+
+def find_duplicates(
+    path: str, index_path: str | Path = DEFAULT_INDEX_PATH
+) -> list[list[FileRecord]]:
+    """Group identical files by size, then partial hash, then full hash.
+
+    Hashes come from the persistent index, so only new or changed files are read.
+    """
+    by_size: dict[int, list[FileRecord]] = defaultdict(list)
+    duplicates: list[list[FileRecord]] = []
+
+    with FileIndex(index_path) as index:
+        for record in index.scan(path):
+            if record.size > 0:
+                by_size[record.size].append(record)
+
+        for same_size in by_size.values():
+            if len(same_size) < 2:
+                continue
+
+            by_partial: dict[str, list[FileRecord]] = defaultdict(list)
+            for record in same_size:
+                try:
+                    by_partial[index.partial_hash(record)].append(record)
+                except OSError as e:
+                    print(f"Error hashing {record.path}: {e}")
+
+            for candidates in by_partial.values():
+                if len(candidates) < 2:
+                    continue
+
+                by_full: dict[str, list[FileRecord]] = defaultdict(list)
+                for record in candidates:
+                    try:
+                        by_full[index.full_hash(record)].append(record)
+                    except OSError as e:
+                        print(f"Error hashing {record.path}: {e}")
+
+                duplicates.extend(
+                    group for group in by_full.values() if len(group) > 1
+                )
+            index.commit()
+
+    return duplicates
+
+
+def report_duplicates(path: str, index_path: str | Path = DEFAULT_INDEX_PATH) -> None:
+    target_path = Path(path)
+
+    if not target_path.exists():
+        print(f"Error: Path '{path}' does not exist")
+        return
+
+    if not target_path.is_dir():
+        print(f"Error: '{path}' is not a directory")
+        return
+
+    duplicates = find_duplicates(path, index_path)
+
+    wasted = 0
+    for group in duplicates:
+        print(f"\n{len(group)} copies, {group[0].size} bytes each:")
+        for record in group:
+            print(f"  {record.path}")
+        wasted += group[0].size * (len(group) - 1)
+
+    print(f"\nDuplicate groups: {len(duplicates)}")
+    print(f"Reclaimable bytes: {wasted}")
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Find duplicate files")
+    parser.add_argument("path")
+    parser.add_argument(
+        "--index",
+        default=str(DEFAULT_INDEX_PATH),
+        help="SQLite index reused between runs (default: %(default)s)",
+    )
+    args = parser.parse_args(argv)
+
+    report_duplicates(args.path, args.index)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,188 @@
 #!/usr/bin/env python3
 
+import csv
 import sys
+import json
+import time
+import argparse
 from pathlib import Path
-from collections import Counter
+from typing import Iterable
+
+from file_index import FileIndex, FileRecord, walk_files
+
+NO_EXTENSION = "(no extension)"
+ROOT_GROUP = "."
+
+# Upper bounds in days, the last bucket is open-ended
+AGE_BUCKETS = [("<30d", 30), ("<1y", 365), ("<3y", 3 * 365), (">=3y", None)]
+
+# Sizes are binned in quarter-octaves, enough for a median within ~20%
+SIZE_SUB_BUCKET_BITS = 2
+
+
+def _size_bucket(size: int) -> int:
+    bits = size.bit_length()
+    if bits <= SIZE_SUB_BUCKET_BITS:
+        return bits << SIZE_SUB_BUCKET_BITS
+    shift = bits - SIZE_SUB_BUCKET_BITS - 1
+    sub = (size >> shift) & ((1 << SIZE_SUB_BUCKET_BITS) - 1)
+    return (bits << SIZE_SUB_BUCKET_BITS) | sub
+
+
+def _size_bucket_bounds(bucket: int) -> tuple[int, int]:
+    bits = bucket >> SIZE_SUB_BUCKET_BITS
+    if bits <= SIZE_SUB_BUCKET_BITS:
+        low = (1 << (bits - 1)) if bits else 0
+        return low, max(low, (1 << bits) - 1)
+    sub = bucket & ((1 << SIZE_SUB_BUCKET_BITS) - 1)
+    shift = bits - SIZE_SUB_BUCKET_BITS - 1
+    low = ((1 << SIZE_SUB_BUCKET_BITS) | sub) << shift
+    return low, low + (1 << shift) - 1
+
+
+class GroupStats:
+    """Constant-memory aggregate of file sizes and ages for one group."""
+
+    __slots__ = ("count", "total_bytes", "min_size", "max_size", "size_hist", "ages")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total_bytes = 0
+        self.min_size = 0
+        self.max_size = 0
+        self.size_hist: dict[int, int] = {}
+        self.ages = [0] * len(AGE_BUCKETS)
+
+    def add(self, size: int, age_days: float) -> None:
+        if self.count == 0:
+            self.min_size = self.max_size = size
+        else:
+            self.min_size = min(self.min_size, size)
+            self.max_size = max(self.max_size, size)
+        self.count += 1
+        self.total_bytes += size
+        bucket = _size_bucket(size)
+        self.size_hist[bucket] = self.size_hist.get(bucket, 0) + 1
+        for i, (_, limit) in enumerate(AGE_BUCKETS):
+            if limit is None or age_days < limit:
+                self.ages[i] += 1
+                break
+
+    @property
+    def median_size(self) -> int:
+        """Approximate median: midpoint of the histogram bucket holding it."""
+        if self.count == 0:
+            return 0
+        middle = (self.count + 1) // 2
+        seen = 0
+        for bucket in sorted(self.size_hist):
+            seen += self.size_hist[bucket]
+            if seen >= middle:
+                low, high = _size_bucket_bounds(bucket)
+                median = (low + high) // 2
+                return min(max(median, self.min_size), self.max_size)
+        return self.max_size
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "total_bytes": self.total_bytes,
+            "min_size": self.min_size,
+            "max_size": self.max_size,
+            "median_size": self.median_size,
+            "ages": {name: n for (name, _), n in zip(AGE_BUCKETS, self.ages)},
+        }
+
+
+class ScanStats:
+    """Single-pass aggregation per extension and per top-level directory."""
+
+    def __init__(self, root: Path, now: float | None = None) -> None:
+        self.root = str(root.resolve())
+        self.now = time.time() if now is None else now
+        self.total = GroupStats()
+        self.by_extension: dict[str, GroupStats] = {}
+        self.by_directory: dict[str, GroupStats] = {}
+
+    def add(self, record: FileRecord) -> None:
+        ext = record.suffix.lower() or NO_EXTENSION
+        relative = record.path[len(self.root) :].lstrip("/\\")
+        parts = relative.replace("\\", "/").split("/", 1)
+        directory = parts[0] if len(parts) > 1 else ROOT_GROUP
+        age_days = (self.now - record.mtime) / 86400
+
+        self.total.add(record.size, age_days)
+        for groups, key in ((self.by_extension, ext), (self.by_directory, directory)):
+            stats = groups.get(key)
+            if stats is None:
+                stats = groups[key] = GroupStats()
+            stats.add(record.size, age_days)
+
+    def add_all(self, records: Iterable[FileRecord]) -> "ScanStats":
+        for record in records:
+            self.add(record)
+        return self
+
+    def to_dict(self) -> dict:
+        return {
+            "root": self.root,
+            "total": self.total.to_dict(),
+            "extensions": {
+                k: v.to_dict() for k, v in self.sorted_groups(self.by_extension)
+            },
+            "directories": {
+                k: v.to_dict() for k, v in self.sorted_groups(self.by_directory)
+            },
+        }
+
+    @staticmethod
+    def sorted_groups(groups: dict[str, GroupStats]) -> list[tuple[str, GroupStats]]:
+        return sorted(groups.items(), key=lambda item: -item[1].count)
+
+
+def write_json(stats: ScanStats, out) -> None:
+    json.dump(stats.to_dict(), out, indent=2, ensure_ascii=False)
+    out.write("\n")
+
+
+def write_csv(stats: ScanStats, out) -> None:
+    age_names = [name for name, _ in AGE_BUCKETS]
+    writer = csv.writer(out)
+    writer.writerow(
+        ["group", "key", "count", "total_bytes", "min_size", "max_size", "median_size"]
+        + [f"age{name}" for name in age_names]
+    )
+    for group, groups in (
+        ("extension", stats.by_extension),
+        ("directory", stats.by_directory),
+    ):
+        for key, s in stats.sorted_groups(groups):
+            writer.writerow(
+                [group, key, s.count, s.total_bytes, s.min_size, s.max_size]
+                + [s.median_size]
+                + s.ages
+            )
+
+
+def print_report(path: str, stats: ScanStats) -> None:
+    total = stats.total.count
+    print(f"File extension analysis for: {path}")
+    print(f"Total files analyzed: {total}")
+    print(f"Unique extensions found: {len(stats.by_extension)}")
+    print("\nExtensions (sorted by frequency):")
+    print("-" * 58)
 
+    for ext, s in stats.sorted_groups(stats.by_extension):
+        percentage = (s.count / total) * 100
+        print(
+            f"{ext:<20} {s.count:>6} files ({percentage:>5.1f}%)"
+            f" {s.total_bytes / 1_000_000:>12.1f} MB"
+        )
 
-def analyze_extensions(path: str) -> None:
+
+def analyze_extensions(
+    path: str, index_path: str | None = None, output_format: str = "text"
+) -> None:
     target_path = Path(path)
 
     if not target_path.exists():
@@ -16,40 +193,43 @@ def analyze_extensions(path: str) -> None:
         print(f"Error: '{path}' is not a directory")
         return
 
-    extensions = []
-
-    for file_path in target_path.rglob("*"):
-        if file_path.is_file():
-            ext = file_path.suffix.lower()
-            if ext:
-                extensions.append(ext)
-            else:
-                extensions.append("(no extension)")
-
-    if not extensions:
+    stats = ScanStats(target_path)
+
+    # With an index the scan also refreshes the stats shared with duplicate_finder
+    index = FileIndex(index_path) if index_path else None
+    try:
+        stats.add_all(index.scan(target_path) if index else walk_files(target_path))
+    finally:
+        if index:
+            index.close()
+
+    if output_format == "json":
+        write_json(stats, sys.stdout)
+    elif output_format == "csv":
+        write_csv(stats, sys.stdout)
+    elif stats.total.count == 0:
         print("No files found in the directory")
-        return
-
-    extension_counts = Counter(extensions)
-
-    print(f"File extension analysis for: {path}")
-    print(f"Total files analyzed: {len(extensions)}")
-    print(f"Unique extensions found: {len(extension_counts)}")
-    print("\nExtensions (sorted by frequency):")
-    print("-" * 40)
-
-    for ext, count in extension_counts.most_common():
-        percentage = (count / len(extensions)) * 100
-        print(f"{ext:<20} {count:>6} files ({percentage:>5.1f}%)")
-
-
-def main():
-    if len(sys.argv) != 2:
-        print("Usage: python extension_analyzer.py <path>")
-        sys.exit(1)
-
-    path = sys.argv[1]
-    analyze_extensions(path)
+    else:
+        print_report(path, stats)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Count files per extension")
+    parser.add_argument("path")
+    parser.add_argument(
+        "--index",
+        help="SQLite index shared with duplicate_finder, refreshed during the scan",
+    )
+    parser.add_argument(
+        "--format",
+        choices=["text", "json", "csv"],
+        default="text",
+        help="json and csv include size and age statistics per extension "
+        "and per top-level directory",
+    )
+    args = parser.parse_args(argv)
+
+    analyze_extensions(args.path, args.index, args.format)
 
 
 if __name__ == "__main__":
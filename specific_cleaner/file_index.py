@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+
+import os
+import hashlib
+import sqlite3
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Collection, Iterator
+
+try:
+    import xxhash
+except ImportError:  # optional, see the duplicate_finder extra
+    xxhash = None
+
+DEFAULT_INDEX_PATH = Path.home() / ".cache" / "toolbox" / "file_index.sqlite3"
+
+PARTIAL_HASH_SIZE = 64 * 1024
+HASH_CHUNK_SIZE = 1024 * 1024
+COMMIT_BATCH_SIZE = 5000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    inode INTEGER NOT NULL,
+    partial_hash TEXT,
+    full_hash TEXT,
+    scan_id INTEGER NOT NULL
+)
+"""
+
+# Records the hash function the stored hashes were computed with
+META_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+)
+"""
+
+# Hashes survive a rescan only when size, mtime and inode are all unchanged.
+UPSERT_SQL = """
+INSERT INTO files (path, size, mtime_ns, inode, scan_id)
+VALUES (?, ?, ?, ?, ?)
+ON CONFLICT(path) DO UPDATE SET
+    size = excluded.size,
+    mtime_ns = excluded.mtime_ns,
+    inode = excluded.inode,
+    scan_id = excluded.scan_id,
+    partial_hash = CASE
+        WHEN files.size = excluded.size
+         AND files.mtime_ns = excluded.mtime_ns
+         AND files.inode = excluded.inode
+        THEN files.partial_hash END,
+    full_hash = CASE
+        WHEN files.size = excluded.size
+         AND files.mtime_ns = excluded.mtime_ns
+         AND files.inode = excluded.inode
+        THEN files.full_hash END
+"""
+
+
+@dataclass(frozen=True)
+class FileRecord:
+    path: str
+    size: int
+    mtime_ns: int
+    inode: int
+
+    @property
+    def mtime(self) -> float:
+        return self.mtime_ns / 1_000_000_000
+
+    @property
+    def suffix(self) -> str:
+        return Path(self.path).suffix
+
+
+HASH_ALGORITHM = "xxh3_128" if xxhash is not None else "blake2b-128"
+
+
+def _new_hasher():
+    if xxhash is not None:
+        return xxhash.xxh3_128()
+    return hashlib.blake2b(digest_size=16)
+
+
+def hash_file(path: str, limit: int | None = None) -> str:
+    """Hash a file, or only its first `limit` bytes when a limit is given."""
+    hasher = _new_hasher()
+    remaining = limit
+    with open(path, "rb") as f:
+        while remaining is None or remaining > 0:
+            chunk = f.read(
+                HASH_CHUNK_SIZE
+                if remaining is None
+                else min(remaining, HASH_CHUNK_SIZE)
+            )
+            if not chunk:
+                break
+            hasher.update(chunk)
+            if remaining is not None:
+                remaining -= len(chunk)
+    return hasher.hexdigest()
+
+
+def walk_files(
+    root: Path,
+    skip_dirs: Collection[str] = (),
+    on_dir_done: Callable[[str], None] | None = None,
+) -> Iterator[FileRecord]:
+    """Yield a record for every file below root using one scandir pass per directory.
+
+    Directories whose path is in skip_dirs are not descended into. on_dir_done is
+    called with a directory path once every file of its subtree has been consumed.
+    """
+    root_str = str(root.resolve())
+    stack: list[tuple[str, bool]] = [(root_str, False)]
+    while stack:
+        current, finished = stack.pop()
+        if finished:
+            on_dir_done(current)
+            continue
+        if on_dir_done is not None:
+            stack.append((current, True))
+        try:
+            with os.scandir(current) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if entry.path not in skip_dirs:
+                                stack.append((entry.path, False))
+                        elif entry.is_file():
+                            st = entry.stat()
+                            yield FileRecord(
+                                entry.path, st.st_size, st.st_mtime_ns, st.st_ino
+                            )
+                    except OSError as e:
+                        print(f"Error reading {entry.path}: {e}")
+        except OSError as e:
+            print(f"Error listing {current}: {e}")
+
+
+class FileIndex:
+    """SQLite index of file stats and hashes, keyed by path and (size, mtime, inode)."""
+
+    def __init__(self, db_path: str | Path = DEFAULT_INDEX_PATH) -> None:
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(self.db_path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(SCHEMA)
+        self.conn.execute(META_SCHEMA)
+        self._check_hash_algorithm()
+        self.conn.commit()
+
+    def _check_hash_algorithm(self) -> None:
+        """Drop cached hashes made by another algorithm (xxhash added or removed)."""
+        row = self.conn.execute(
+            "SELECT value FROM meta WHERE key = 'hash_algorithm'"
+        ).fetchone()
+        if row is not None and row[0] == HASH_ALGORITHM:
+            return
+        self.conn.execute("UPDATE files SET partial_hash = NULL, full_hash = NULL")
+        self.conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES ('hash_algorithm', ?)",
+            (HASH_ALGORITHM,),
+        )
+
+    def __enter__(self) -> "FileIndex":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.conn.commit()
+        self.conn.close()
+
+    def scan(self, root: str | Path) -> Iterator[FileRecord]:
+        """Walk root, refresh the stored stats and drop rows for files that disappeared.
+
+        Only stats are read here; hashes are computed lazily and kept as long as
+        the file's (size, mtime, inode) does not change. Stale rows are pruned once
+        the generator is exhausted.
+        """
+        root_str = str(Path(root).resolve())
+        scan_id = time.time_ns()
+        batch: list[tuple[str, int, int, int, int]] = []
+
+        for record in walk_files(Path(root_str)):
+            batch.append(
+                (record.path, record.size, record.mtime_ns, record.inode, scan_id)
+            )
+            if len(batch) >= COMMIT_BATCH_SIZE:
+                self._flush(batch)
+            yield record
+
+        self._flush(batch)
+        prefix = root_str.rstrip(os.sep) + os.sep
+        upper = prefix[:-1] + chr(ord(os.sep) + 1)
+        self.conn.execute(
+            "DELETE FROM files WHERE path >= ? AND path < ? AND scan_id != ?",
+            (prefix, upper, scan_id),
+        )
+        self.conn.commit()
+
+    def _flush(self, batch: list[tuple[str, int, int, int, int]]) -> None:
+        if batch:
+            self.conn.executemany(UPSERT_SQL, batch)
+            self.conn.commit()
+            batch.clear()
+
+    def _cached_hash(self, record: FileRecord, column: str) -> str | None:
+        row = self.conn.execute(
+            f"SELECT {column} FROM files"
+            " WHERE path = ? AND size = ? AND mtime_ns = ? AND inode = ?",
+            (record.path, record.size, record.mtime_ns, record.inode),
+        ).fetchone()
+        return row[0] if row else None
+
+    def _store_hash(self, record: FileRecord, column: str, value: str) -> None:
+        self.conn.execute(
+            f"UPDATE files SET {column} = ?"
+            " WHERE path = ? AND size = ? AND mtime_ns = ? AND inode = ?",
+            (value, record.path, record.size, record.mtime_ns, record.inode),
+        )
+
+    def partial_hash(self, record: FileRecord) -> str:
+        """Hash of the first PARTIAL_HASH_SIZE bytes, reused while the file is unchanged."""
+        cached = self._cached_hash(record, "partial_hash")
+        if cached is None:
+            cached = hash_file(record.path, PARTIAL_HASH_SIZE)
+            self._store_hash(record, "partial_hash", cached)
+        return cached
+
+    def full_hash(self, record: FileRecord) -> str:
+        """Hash of the whole file, reused while the file is unchanged."""
+        if record.size <= PARTIAL_HASH_SIZE:
+            return self.partial_hash(record)
+        cached = self._cached_hash(record, "full_hash")
+        if cached is None:
+            cached = hash_file(record.path)
+            self._store_hash(record, "full_hash", cached)
+        return cached
+
+    def commit(self) -> None:
+        self.conn.commit()
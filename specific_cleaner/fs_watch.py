@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""Recursive inotify watch of a directory tree, for the cleaners' --watch mode.
+
+inotify is reached through ctypes, so this needs Linux but no extra package.
+Files are handed over in batches once they have been quiet for a debounce
+delay, and a full reconciliation pass catches whatever inotify cannot report
+(queue overflows, the watch limit, changes made while stopped).
+"""
+
+import os
+import stat
+import time
+import errno
+import ctypes
+import ctypes.util
+import select
+import struct
+import argparse
+from pathlib import Path
+from typing import Callable
+
+from file_index import FileRecord
+
+# inotify(7) event bits
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+
+# A file is reported once written and closed, moved in, or touched, never on
+# creation, so a file still being copied is not picked up half-written
+WATCH_MASK = (
+    IN_ATTRIB
+    | IN_CLOSE_WRITE
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE_SELF
+    | IN_MOVE_SELF
+    | IN_ONLYDIR
+)
+EVENT_HEADER = struct.Struct("iIII")
+READ_SIZE = 64 * 1024
+
+DEFAULT_DEBOUNCE = 2.0
+DEFAULT_RECONCILE_INTERVAL = 3600.0
+
+
+def _load_libc() -> ctypes.CDLL:
+    libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+    if not hasattr(libc, "inotify_init1"):
+        raise OSError("watch mode needs Linux inotify")
+    libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+    return libc
+
+
+class TreeWatcher:
+    """One inotify watch per directory below root, kept in step with the tree."""
+
+    def __init__(self, root: Path, skip_dir: Callable[[str], bool]) -> None:
+        self.libc = _load_libc()
+        self.skip_dir = skip_dir
+        # wd -> (directory path, inode), to notice directories moved away
+        self.paths: dict[int, tuple[str, int]] = {}
+        self.limit_reached = False
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, f"inotify_init1: {os.strerror(error)}")
+        self.add_tree(str(root.resolve()))
+
+    def __enter__(self) -> "TreeWatcher":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+    def _add_watch(self, path: str) -> bool:
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            error = ctypes.get_errno()
+            if error == errno.ENOSPC:
+                if not self.limit_reached:
+                    print(
+                        f"Warning: inotify watch limit reached at {path}, raise "
+                        "fs.inotify.max_user_watches; until then only the "
+                        "reconciliation scan sees the unwatched directories"
+                    )
+                    self.limit_reached = True
+            elif error not in (errno.ENOENT, errno.ENOTDIR):
+                print(f"Error watching {path}: {os.strerror(error)}")
+            return False
+        try:
+            self.paths[wd] = (path, os.stat(path).st_ino)
+        except OSError:
+            return False
+        return True
+
+    def add_tree(self, top: str) -> list[str]:
+        """Watch top and its subdirectories; returns the files already in them.
+
+        Watching an already watched directory only updates its path, which is
+        how directories moved within the tree are followed.
+        """
+        files = []
+        stack = [top]
+        while stack:
+            current = stack.pop()
+            if not self._add_watch(current):
+                continue
+            try:
+                with os.scandir(current) as entries:
+                    for entry in entries:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                if not self.skip_dir(entry.path):
+                                    stack.append(entry.path)
+                            elif entry.is_file():
+                                files.append(entry.path)
+                        except OSError as e:
+                            print(f"Error reading {entry.path}: {e}")
+            except OSError as e:
+                print(f"Error listing {current}: {e}")
+        return files
+
+    def _forget_if_moved_out(self, wd: int) -> None:
+        path, inode = self.paths[wd]
+        try:
+            if os.stat(path).st_ino == inode:
+                return  # moved within the tree, add_tree already renamed it
+        except OSError:
+            pass
+        prefix = path + os.sep
+        for other, (other_path, _) in list(self.paths.items()):
+            if other == wd or other_path.startswith(prefix):
+                self.libc.inotify_rm_watch(self.fd, other)
+                del self.paths[other]
+
+    def read(self, timeout: float) -> tuple[set[str], bool]:
+        """Files changed within timeout seconds, and whether events were lost."""
+        changed: set[str] = set()
+        overflow = False
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return changed, overflow
+        while True:
+            try:
+                data = os.read(self.fd, READ_SIZE)
+            except BlockingIOError:
+                return changed, overflow
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+                offset += EVENT_HEADER.size
+                name = data[offset : offset + length].rstrip(b"\0")
+                offset += length
+                if mask & IN_Q_OVERFLOW:
+                    overflow = True
+                    continue
+                if mask & IN_IGNORED:
+                    self.paths.pop(wd, None)
+                    continue
+                if wd not in self.paths or mask & IN_DELETE_SELF:
+                    continue
+                if mask & IN_MOVE_SELF:
+                    self._forget_if_moved_out(wd)
+                    continue
+                path = os.path.join(self.paths[wd][0], os.fsdecode(name))
+                if mask & IN_ISDIR:
+                    # A new or moved-in directory may already hold files
+                    if mask & (IN_CREATE | IN_MOVED_TO) and not self.skip_dir(path):
+                        changed.update(self.add_tree(path))
+                elif not mask & IN_CREATE:
+                    changed.add(path)
+
+
+def stat_records(paths: list[str]) -> list[FileRecord]:
+    """Records of the paths that are still regular files."""
+    records = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue  # removed or moved again before the batch ran
+        if stat.S_ISREG(st.st_mode):
+            records.append(FileRecord(path, st.st_size, st.st_mtime_ns, st.st_ino))
+    return records
+
+
+def watch_tree(
+    root: Path,
+    handle_batch: Callable[[list[str]], None],
+    reconcile: Callable[[], None],
+    skip_dir: Callable[[str], bool] = lambda path: False,
+    debounce: float = DEFAULT_DEBOUNCE,
+    reconcile_interval: float = DEFAULT_RECONCILE_INTERVAL,
+) -> None:
+    """Apply a tool's rules to changed files until interrupted.
+
+    reconcile() runs first, then every reconcile_interval seconds and after an
+    event overflow. handle_batch() gets the files that had no new event for
+    `debounce` seconds, so the steady-state cost follows the number of changes.
+    """
+    top = str(root.resolve())
+    with TreeWatcher(root, skip_dir) as watcher:
+        # Watching starts before the first scan so nothing created meanwhile is lost
+        reconcile()
+        next_reconcile = time.monotonic() + reconcile_interval
+        pending: dict[str, float] = {}
+        while True:
+            deadline = next_reconcile
+            if pending:
+                deadline = min(deadline, min(pending.values()) + debounce)
+            changed, overflow = watcher.read(max(0.0, deadline - time.monotonic()))
+            now = time.monotonic()
+            for path in changed:
+                pending[path] = now
+            if overflow or now >= next_reconcile:
+                if overflow:
+                    print("Event queue overflowed, rescanning the whole tree")
+                pending.clear()
+                # Re-watch first: directories whose events were lost or skipped at
+                # the watch limit are picked up, already watched ones are no-ops
+                watcher.limit_reached = False
+                watcher.add_tree(top)
+                reconcile()
+                next_reconcile = time.monotonic() + reconcile_interval
+                continue
+            due = [path for path, seen in pending.items() if now - seen >= debounce]
+            if not due:
+                continue
+            for path in due:
+                del pending[path]
+            try:
+                handle_batch(sorted(due))
+            except OSError as e:
+                # The next reconciliation retries whatever this batch missed
+                print(f"Error handling {len(due)} changed files: {e}")
+
+
+def add_watch_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="keep running and handle new or changed files as they appear (Linux)",
+    )
+    parser.add_argument(
+        "--debounce",
+        type=float,
+        default=DEFAULT_DEBOUNCE,
+        help="with --watch, seconds a file must stay untouched (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--reconcile-every",
+        type=float,
+        default=DEFAULT_RECONCILE_INTERVAL,
+        help="with --watch, seconds between full rescans (default: %(default)s)",
+    )
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import json
+import errno
+import shutil
+from pathlib import Path
+
+SYNC_EVERY = 1000
+
+
+class Journal:
+    """Append-only JSON-lines journal of planned and completed file moves.
+
+    Deletes are journaled as moves into a trash folder so they can be undone.
+    Records are fsynced in batches; callers call sync() before acting on a batch
+    of plans so that every action on disk has a durable plan record.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self.pending: dict[str, str] = {}
+        self.done_dirs: set[str] = set()
+        self.unsynced = 0
+        if self.path.exists():
+            self._load()
+        self.file = open(self.path, "a", encoding="utf-8")
+        if self.file.tell() > 0:
+            self._terminate_torn_line()
+
+    def _terminate_torn_line(self) -> None:
+        with open(self.path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                self.file.write("\n")
+
+    def _load(self) -> None:
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # torn write from an interrupted run
+                kind = record["type"]
+                if kind == "plan":
+                    self.pending[record["src"]] = record["dst"]
+                elif kind == "done":
+                    self.pending.pop(record["src"], None)
+                elif kind == "dir_done":
+                    self.done_dirs.add(record["path"])
+                elif kind == "complete":
+                    self.pending.clear()
+                    self.done_dirs.clear()
+
+    @property
+    def resumable(self) -> bool:
+        return bool(self.pending or self.done_dirs)
+
+    def _write(self, record: dict) -> None:
+        self.file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.unsynced += 1
+        if self.unsynced >= SYNC_EVERY:
+            self.sync()
+
+    def sync(self) -> None:
+        if self.unsynced:
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            self.unsynced = 0
+
+    def plan(self, action: str, src: str | Path, dst: str | Path) -> None:
+        self.pending[str(src)] = str(dst)
+        self._write(
+            {"type": "plan", "action": action, "src": str(src), "dst": str(dst)}
+        )
+
+    def done(self, src: str | Path) -> None:
+        self.pending.pop(str(src), None)
+        self._write({"type": "done", "src": str(src)})
+
+    def dir_done(self, path: str) -> None:
+        self.done_dirs.add(path)
+        self._write({"type": "dir_done", "path": path})
+
+    def undone(self, src: str, dst: str) -> None:
+        self._write({"type": "undone", "src": src, "dst": dst})
+
+    def complete(self) -> None:
+        self.pending.clear()
+        self.done_dirs.clear()
+        self._write({"type": "complete"})
+        self.sync()
+
+    def close(self) -> None:
+        self.sync()
+        self.file.close()
+
+
+def move_file(src: str | Path, dst: str | Path) -> None:
+    """Rename, falling back to copy-then-delete across devices."""
+    try:
+        os.rename(src, dst)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        shutil.copy2(src, dst)
+        os.unlink(src)
+
+
+def completed_moves(journal_path: str | Path) -> list[tuple[str, str]]:
+    """Return (src, dst) of every completed move still in effect, oldest first."""
+    planned: dict[str, str] = {}
+    moves: list[tuple[str, str]] = []
+    undone: set[tuple[str, str]] = set()
+    with open(journal_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if record["type"] == "plan":
+                planned[record["src"]] = record["dst"]
+            elif record["type"] == "done" and record["src"] in planned:
+                moves.append((record["src"], planned.pop(record["src"])))
+            elif record["type"] == "undone":
+                undone.add((record["src"], record["dst"]))
+    # A move can land on disk while its done record was lost before the next fsync
+    for src, dst in planned.items():
+        if os.path.exists(dst) and not os.path.exists(src):
+            moves.append((src, dst))
+    return [move for move in moves if move not in undone]
+
+
+def undo_journal(journal_path: str | Path) -> None:
+    """Replay a journal in reverse, moving every file back where it came from.
+
+    A file is never restored over another one: when its original path is taken
+    again it stays where it was moved, and it is reported as a conflict.
+    """
+    journal_path = Path(journal_path)
+    if not journal_path.exists():
+        print(f"Error: Journal '{journal_path}' does not exist")
+        return
+
+    restored_count = 0
+    conflict_count = 0
+    error_count = 0
+    moves = completed_moves(journal_path)
+    journal = Journal(journal_path)
+    try:
+        for src, dst in reversed(moves):
+            src_exists = os.path.lexists(src)
+            if not os.path.lexists(dst):
+                if src_exists:
+                    # Already restored by an interrupted undo
+                    journal.undone(src, dst)
+                else:
+                    print(f"Error restoring {src}: {dst} is missing")
+                    error_count += 1
+                continue
+            if src_exists:
+                print(f"Conflict: {src} exists, leaving {dst} in place")
+                conflict_count += 1
+                continue
+            try:
+                os.makedirs(os.path.dirname(src), exist_ok=True)
+                move_file(dst, src)
+            except OSError as e:
+                print(f"Error restoring {src}: {e}")
+                error_count += 1
+                continue
+            print(f"Restored: {src}")
+            restored_count += 1
+            journal.undone(src, dst)
+    finally:
+        journal.close()
+
+    print("\nUndo complete.")
+    print(f"Files restored: {restored_count}")
+    if conflict_count > 0:
+        print(f"Conflicts (not restored): {conflict_count}")
+    if error_count > 0:
+        print(f"Errors: {error_count}")
+
+
+def main(argv: list[str] | None = None) -> None:
+    argv = sys.argv[1:] if argv is None else argv
+    # The action may be left out, as in `toolbox undo <journal>`
+    if len(argv) == 2 and argv[0] == "undo":
+        argv = argv[1:]
+    if len(argv) != 1:
+        print("Usage: python op_journal.py [undo] <journal>")
+        sys.exit(1)
+
+    undo_journal(argv[0])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,431 @@
+import os
+import re
+import sys
+import json
+import bisect
+import logging
+import argparse
+import datetime
+from datetime import timedelta
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+import clockify
+from workdays import get_calendar
+
+TIMEZONE = clockify.TIMEZONE
+CALENDAR_ID = "primary"
+# Google caps maxResults at 2500, so a week is a single page
+EVENTS_PAGE_SIZE = 2500
+EVENT_FIELDS = (
+    "nextPageToken,"
+    "items(id,status,summary,transparency,start,end,attendees(self,responseStatus))"
+)
+
+# Rules file, overridable with CLOCKIFY_CALENDAR_RULES. First matching rule wins, e.g.
+# {
+#     "rules": [
+#         {"match": "standup", "project_id": "6571c5455e233f2fc06a3b24",
+#          "description": "Morning Standup"},
+#         {"match": "^focus", "skip": true}
+#     ],
+#     "default_project_id": null
+# }
+DEFAULT_RULES_FILE = Path(__file__).with_name("calendar_rules.json")
+# Schedule template (google_calendar/schedule_template.py format) that autofill
+# expands instead of the fixed 9:00-17:00 day, when set
+SCHEDULE_TEMPLATE_ENV = "CLOCKIFY_SCHEDULE_TEMPLATE"
+GOOGLE_CALENDAR_DIR = Path(__file__).resolve().parent.parent / "google_calendar"
+
+
+@dataclass(frozen=True)
+class Rule:
+    pattern: re.Pattern
+    project_id: Optional[str]
+    description: Optional[str]
+    skip: bool
+
+
+@dataclass(frozen=True)
+class PlannedEntry:
+    start: datetime.datetime
+    end: datetime.datetime
+    description: str
+    project_id: Optional[str]
+
+
+def rules_file() -> Path:
+    return Path(os.getenv("CLOCKIFY_CALENDAR_RULES", DEFAULT_RULES_FILE))
+
+
+def schedule_template_file() -> Optional[Path]:
+    path = os.getenv(SCHEDULE_TEMPLATE_ENV)
+    return Path(path) if path else None
+
+
+def load_rules(path: Path) -> Tuple[List[Rule], Optional[str]]:
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    rules = [
+        Rule(
+            pattern=re.compile(rule["match"], re.IGNORECASE),
+            project_id=rule.get("project_id"),
+            description=rule.get("description"),
+            skip=rule.get("skip", False),
+        )
+        for rule in data.get("rules", [])
+    ]
+    return rules, data.get("default_project_id")
+
+
+def list_events(
+    service: Any, start: datetime.datetime, end: datetime.datetime
+) -> Iterator[Dict[str, Any]]:
+    """Every timed event of the range, recurring events expanded by Google."""
+    page_token = None
+    while True:
+        response = (
+            service.events()
+            .list(
+                calendarId=CALENDAR_ID,
+                timeMin=start.isoformat(),
+                timeMax=end.isoformat(),
+                singleEvents=True,
+                orderBy="startTime",
+                maxResults=EVENTS_PAGE_SIZE,
+                pageToken=page_token,
+                fields=EVENT_FIELDS,
+            )
+            .execute()
+        )
+        yield from response.get("items", [])
+        page_token = response.get("nextPageToken")
+        if not page_token:
+            return
+
+
+def _is_attended(event: Dict[str, Any]) -> bool:
+    if event.get("status") == "cancelled" or event.get("transparency") == "transparent":
+        return False
+    for attendee in event.get("attendees", []):
+        if attendee.get("self") and attendee.get("responseStatus") == "declined":
+            return False
+    # All-day events have a "date" instead of a "dateTime"
+    return "dateTime" in event.get("start", {}) and "dateTime" in event.get("end", {})
+
+
+def _parse_event_time(value: Dict[str, str], tz: ZoneInfo) -> datetime.datetime:
+    return datetime.datetime.fromisoformat(value["dateTime"]).astimezone(tz)
+
+
+def plan_entries(
+    events: Iterator[Dict[str, Any]],
+    rules: List[Rule],
+    default_project_id: Optional[str],
+) -> List[PlannedEntry]:
+    """Map attended events on working days to Clockify entries through the rules."""
+    tz = ZoneInfo(TIMEZONE)
+    calendar = get_calendar()
+    planned = []
+    for event in events:
+        if not _is_attended(event):
+            continue
+        start = _parse_event_time(event["start"], tz)
+        end = _parse_event_time(event["end"], tz)
+        if not calendar.is_workday(start.date()):
+            continue
+        if calendar.is_blocked(start.date(), start.time(), end.time()):
+            logging.info(f"Skipping '{event.get('summary', '')}' in a blocked window")
+            continue
+        summary = event.get("summary", "")
+        rule = next((r for r in rules if r.pattern.search(summary)), None)
+        if rule is not None and rule.skip:
+            continue
+        if rule is None and default_project_id is None:
+            logging.info(f"No rule for '{summary}', skipping")
+            continue
+        planned.append(
+            PlannedEntry(
+                start=start,
+                end=end,
+                description=(rule and rule.description) or summary,
+                project_id=(rule and rule.project_id) or default_project_id,
+            )
+        )
+    return planned
+
+
+def _parse_utc(value: str) -> datetime.datetime:
+    return datetime.datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+class OverlapIndex:
+    """Existing intervals sorted by start, with a running maximum of their ends.
+
+    An interval [start, end) overlaps something iff, among the intervals that
+    start before `end`, the latest end is after `start`: one bisect per query.
+    """
+
+    def __init__(self, intervals: List[Tuple[datetime.datetime, datetime.datetime]]):
+        intervals = sorted(intervals)
+        self.starts = [start for start, _ in intervals]
+        self.ends = [end for _, end in intervals]
+        self.max_ends: List[datetime.datetime] = []
+        for _, end in intervals:
+            self.max_ends.append(max(end, self.max_ends[-1]) if self.max_ends else end)
+
+    @classmethod
+    def from_entries(cls, entries: List[Dict[str, Any]]) -> "OverlapIndex":
+        intervals = []
+        for entry in entries:
+            interval = entry.get("timeInterval") or {}
+            # A running timer has no end yet, treat it as open-ended
+            if interval.get("start"):
+                start = _parse_utc(interval["start"])
+                end = (
+                    _parse_utc(interval["end"])
+                    if interval.get("end")
+                    else datetime.datetime.max.replace(tzinfo=datetime.timezone.utc)
+                )
+                intervals.append((start, end))
+        return cls(intervals)
+
+    def overlaps(self, start: datetime.datetime, end: datetime.datetime) -> bool:
+        before_end = bisect.bisect_left(self.starts, end)
+        return before_end > 0 and self.max_ends[before_end - 1] > start
+
+    def next_start(
+        self, start: datetime.datetime, end: datetime.datetime
+    ) -> datetime.datetime:
+        """Start of the first interval beginning in [start, end), or end."""
+        index = bisect.bisect_left(self.starts, start)
+        if index < len(self.starts) and self.starts[index] < end:
+            return self.starts[index]
+        return end
+
+    def gaps(
+        self, start: datetime.datetime, end: datetime.datetime
+    ) -> List[Tuple[datetime.datetime, datetime.datetime]]:
+        """The parts of [start, end) that no interval covers."""
+        index = bisect.bisect_left(self.starts, start)
+        cursor = start
+        if index > 0:
+            cursor = max(cursor, self.max_ends[index - 1])
+        free = []
+        while index < len(self.starts) and self.starts[index] < end:
+            if self.starts[index] > cursor:
+                free.append((cursor, self.starts[index]))
+            cursor = max(cursor, self.ends[index])
+            index += 1
+        if cursor < end:
+            free.append((cursor, end))
+        return free
+
+
+def missing_entries(
+    planned: List[PlannedEntry], existing: OverlapIndex
+) -> List[PlannedEntry]:
+    """Planned entries overlapping neither Clockify nor an earlier kept event."""
+    missing: List[PlannedEntry] = []
+    for entry in sorted(planned, key=lambda e: (e.start, e.end)):
+        if existing.overlaps(entry.start, entry.end):
+            continue
+        # Overlapping meetings: keep the first one rather than double-count
+        if missing and missing[-1].end > entry.start:
+            continue
+        missing.append(entry)
+    return missing
+
+
+def _add_google_calendar_path() -> None:
+    # The Google credentials flow and the template compiler live with the calendar tools
+    if str(GOOGLE_CALENDAR_DIR) not in sys.path:
+        sys.path.insert(0, str(GOOGLE_CALENDAR_DIR))
+
+
+def get_calendar_service() -> Any:
+    _add_google_calendar_path()
+    from add_google_event import get_calendar_service as google_service
+
+    return google_service()
+
+
+def template_events(
+    path: Path, first_day: datetime.date, last_day: datetime.date
+) -> Iterator[Dict[str, Any]]:
+    """Occurrences of a schedule template, shaped like Google Calendar events.
+
+    The template is compiled once per content (see schedule_template.py), so this
+    costs no parsing or API call on later runs.
+    """
+    _add_google_calendar_path()
+    from schedule_template import load_template
+
+    for occurrence in load_template(path).occurrences(first_day, last_day):
+        yield {
+            "summary": occurrence.summary,
+            "start": {"dateTime": occurrence.start.isoformat()},
+            "end": {"dateTime": occurrence.end.isoformat()},
+        }
+
+
+def _day_range(
+    first_day: datetime.date, last_day: datetime.date
+) -> Tuple[datetime.datetime, datetime.datetime]:
+    tz = ZoneInfo(TIMEZONE)
+    start = datetime.datetime.combine(first_day, datetime.time(0, 0), tzinfo=tz)
+    end = datetime.datetime.combine(
+        last_day + timedelta(days=1), datetime.time(0, 0), tzinfo=tz
+    )
+    return start, end
+
+
+def existing_entries(
+    connection: clockify.Connection,
+    start: datetime.datetime,
+    end: datetime.datetime,
+) -> OverlapIndex:
+    pages = clockify.iter_time_entries(start, end, connection)
+    return OverlapIndex.from_entries([entry for page in pages for entry in page])
+
+
+def sync_calendar(
+    first_day: datetime.date,
+    last_day: datetime.date,
+    connection: clockify.Connection,
+    rules_path: Optional[Path] = None,
+    dry_run: bool = False,
+    template: Optional[Path] = None,
+    before: Optional[datetime.time] = None,
+) -> int:
+    """Create the Clockify entries missing for the calendar events of a range.
+
+    Each entry keeps its event's start and end; with `before`, only the events
+    starting before that time of day are considered. Costs one paged events
+    listing (none with a schedule template) and one paged time-entries listing,
+    then one POST per missing entry. Returns the number of entries (to be)
+    created.
+    """
+    start, end = _day_range(first_day, last_day)
+
+    rules, default_project_id = load_rules(rules_path or rules_file())
+    if template is not None:
+        events = template_events(template, first_day, last_day)
+    else:
+        events = list_events(get_calendar_service(), start, end)
+    planned = plan_entries(events, rules, default_project_id)
+    if before is not None:
+        planned = [entry for entry in planned if entry.start.time() < before]
+
+    missing = missing_entries(planned, existing_entries(connection, start, end))
+    logging.info(
+        f"{len(planned)} calendar entries, {len(planned) - len(missing)} already in "
+        f"Clockify, {len(missing)} to create"
+    )
+
+    for entry in missing:
+        if dry_run:
+            logging.info(
+                f"Would create '{entry.description}' on {entry.start.date()} "
+                f"from {entry.start.strftime('%H:%M')} to {entry.end.strftime('%H:%M')}"
+            )
+            continue
+        clockify.create_time_entry(
+            entry.start,
+            entry.end,
+            entry.description,
+            project_id=entry.project_id,
+            connection=connection,
+        )
+    return len(missing)
+
+
+def fill_start_of_day(
+    connection: clockify.Connection,
+    start: datetime.datetime,
+    description: str,
+    latest_end: datetime.time,
+) -> int:
+    """Log `description` from start up to the first Clockify entry of the day.
+
+    Only the time that existing entries and blocked windows leave free is
+    filled, and latest_end bounds it when nothing follows. Returns the number
+    of entries created.
+    """
+    index = existing_entries(connection, *_day_range(start.date(), start.date()))
+    end = index.next_start(
+        start, datetime.datetime.combine(start.date(), latest_end, tzinfo=start.tzinfo)
+    )
+    day, tz = start.date(), start.tzinfo
+    calendar = get_calendar()
+    created = 0
+    for gap_start, gap_end in index.gaps(start, end):
+        # Clockify intervals are in UTC, blocked windows in local time
+        for free_start, free_end in calendar.free_windows(
+            day, gap_start.astimezone(tz).time(), gap_end.astimezone(tz).time()
+        ):
+            clockify.create_time_entry(
+                datetime.datetime.combine(day, free_start, tzinfo=tz),
+                datetime.datetime.combine(day, free_end, tzinfo=tz),
+                description,
+                connection=connection,
+            )
+            created += 1
+    return created
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    clockify.configure()
+
+    today = datetime.datetime.now(ZoneInfo(TIMEZONE)).date()
+    monday = today - timedelta(days=today.weekday())
+    parser = argparse.ArgumentParser(
+        description="Create Clockify entries for the Google Calendar events of a range"
+    )
+    parser.add_argument(
+        "--start",
+        type=datetime.date.fromisoformat,
+        default=monday,
+        help="YYYY-MM-DD (default: Monday of this week)",
+    )
+    parser.add_argument(
+        "--end",
+        type=datetime.date.fromisoformat,
+        default=monday + timedelta(days=6),
+        help="YYYY-MM-DD, inclusive (default: Sunday of this week)",
+    )
+    parser.add_argument(
+        "--rules",
+        type=Path,
+        default=rules_file(),
+        help="JSON rules mapping event titles to projects (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--template",
+        type=Path,
+        default=schedule_template_file(),
+        help=f"expand this schedule template instead of reading Google Calendar "
+        f"(default: ${SCHEDULE_TEMPLATE_ENV})",
+    )
+    parser.add_argument(
+        "--dry-run", action="store_true", help="only log the entries to create"
+    )
+    args = parser.parse_args(argv)
+
+    if not args.rules.exists():
+        logging.error(f"Rules file {args.rules} does not exist")
+        return
+    sync_calendar(
+        args.start,
+        args.end,
+        clockify.current_connection(),
+        args.rules,
+        dry_run=args.dry_run,
+        template=args.template,
+    )
+
+
+if __name__ == "__main__":
+    main()
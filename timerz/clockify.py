@@ -1,24 +1,20 @@
+import argparse
 import requests
 import datetime
 from datetime import timedelta
 from zoneinfo import ZoneInfo
 import random
+from dataclasses import dataclass
 from dotenv import load_dotenv
 import os
 import logging
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, Iterator, List, Optional
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO, format="%(asctime)s - %(message)s", datefmt="%Y-%m-%d %H:%M:%S"
-)
+from workdays import get_calendar
 
-# Load environment variables
-load_dotenv()
-
-API_KEY = os.getenv("API_KEY")
-WORKSPACE_ID = os.getenv("WORKSPACE_ID")
-USER_ID = os.getenv("USER_ID")
+API_KEY: Optional[str] = None
+WORKSPACE_ID: Optional[str] = None
+USER_ID: Optional[str] = None
 TIMEZONE = "Europe/Paris"
 
 BASE_URL = "https://api.clockify.me/api/v1"
@@ -28,13 +24,77 @@ HEADERS: Dict[str, Optional[str]] = {
     "Content-Type": "application/json",
 }
 
+# One pooled session so repeated calls (and the daemon) reuse TLS connections
+SESSION = requests.Session()
+
+ACTIONS = ["daily", "remove_nights", "audit", "autofill_specific_date", "daemon"]
+
+# Daemon schedules (cron syntax, Europe/Paris), overridable from the environment
+DEFAULT_SCHEDULES = {
+    "morning_schedule": "0 9 * * 1-5",
+    "hpfo_task": "0 17 * * 1-5",
+    "afternoon_meetings": "0 18 * * 1-5",
+    "remove_nights": "0 21 * * 5",
+}
+DEFAULT_STATUS_PORT = 8765
+
+# The morning schedule logs the calendar meetings starting before the lunch break
+LUNCH_START = datetime.time(12, 0)
+
+
+def configure() -> None:
+    """Set up logging and load credentials from the environment / .env file.
+
+    Kept out of import time so importing this module stays side-effect free.
+    """
+    global API_KEY, WORKSPACE_ID, USER_ID
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S",
+    )
+    load_dotenv()
+
+    API_KEY = os.getenv("API_KEY")
+    WORKSPACE_ID = os.getenv("WORKSPACE_ID")
+    USER_ID = os.getenv("USER_ID")
+    HEADERS["X-Api-Key"] = API_KEY
+
+
+@dataclass(frozen=True)
+class Connection:
+    """Credentials and pooled session of a configured run.
+
+    Helper modules receive it explicitly, so they never depend on which copy of
+    this module (the script or an import of it) was configured.
+    """
+
+    workspace_id: Optional[str]
+    user_id: Optional[str]
+    headers: Dict[str, Optional[str]]
+    session: requests.Session
+
+
+def current_connection() -> Connection:
+    return Connection(WORKSPACE_ID, USER_ID, dict(HEADERS), SESSION)
+
+
+PAGE_SIZE = 5000
+
 
 def get_time_entries(
     start_date: Optional[datetime.datetime] = None,
     end_date: Optional[datetime.datetime] = None,
+    page: int = 1,
+    connection: Optional[Connection] = None,
 ) -> List[Dict[str, Any]]:
     """Get time entries within a date range. If no dates provided, gets all entries."""
-    url = f"{BASE_URL}/workspaces/{WORKSPACE_ID}/user/{USER_ID}/time-entries"
+    connection = connection or current_connection()
+    url = (
+        f"{BASE_URL}/workspaces/{connection.workspace_id}"
+        f"/user/{connection.user_id}/time-entries"
+    )
 
     # Convert to UTC for Clockify API
     start_str: Optional[str] = None
@@ -48,18 +108,36 @@ def get_time_entries(
         end_str = end_utc.strftime("%Y-%m-%dT%H:%M:%SZ")
 
     # Clockify API expects dates in UTC format
-    params: Dict[str, Any] = {"page-size": 5000}  # Get maximum entries per request
+    params: Dict[str, Any] = {"page-size": PAGE_SIZE, "page": page}
     if start_str:
         params["start"] = start_str
     if end_str:
         params["end"] = end_str
 
     logging.info(f"Fetching entries with params: {params}")
-    response = requests.get(url, headers=HEADERS, params=params)
+    response = connection.session.get(
+        url, headers=connection.headers, params=params
+    )
     response.raise_for_status()
     return response.json()
 
 
+def iter_time_entries(
+    start_date: Optional[datetime.datetime] = None,
+    end_date: Optional[datetime.datetime] = None,
+    connection: Optional[Connection] = None,
+) -> Iterator[List[Dict[str, Any]]]:
+    """Yield time entries page by page until the range is exhausted."""
+    page = 1
+    while True:
+        entries = get_time_entries(start_date, end_date, page, connection)
+        if entries:
+            yield entries
+        if len(entries) < PAGE_SIZE:
+            return
+        page += 1
+
+
 def remove_night_entries() -> None:
     """Remove time entries between 8 PM and 9 AM for the last 2 weeks"""
     today = datetime.datetime.now(ZoneInfo(TIMEZONE))
@@ -88,6 +166,16 @@ def remove_night_entries() -> None:
     logging.info(f"Finished processing {entries_processed} entries")
 
 
+def audit_night_entries() -> None:
+    """Read-only preview of remove_nights: violating minutes per user and day."""
+    # numpy is only needed for the audit
+    from clockify_reports import AUDIT_DAYS, fetch_entries, print_audit
+
+    today = datetime.datetime.now(ZoneInfo(TIMEZONE)).date()
+    first_day = today - timedelta(days=AUDIT_DAYS)
+    print_audit(fetch_entries(first_day, today, current_connection()))
+
+
 def adjust_night_entry(entry: Dict[str, Any]) -> None:
     """Split and adjust time entries to remove work during nights, weekends, and lunch"""
     logging.info(
@@ -109,11 +197,14 @@ def adjust_night_entry(entry: Dict[str, Any]) -> None:
 
     logging.info(f"Entry time range: {start_time} to {end_time}")
 
-    # Skip weekend entries entirely
-    if start_time.weekday() >= 5 or end_time.weekday() >= 5:
-        logging.info("Skipping weekend entry")
+    # Remove entries on weekends, public holidays and leave entirely
+    calendar = get_calendar()
+    if not calendar.is_workday(start_time.date()) or not calendar.is_workday(
+        end_time.date()
+    ):
+        logging.info("Skipping entry on a non-working day")
         delete_url = f"{BASE_URL}/workspaces/{WORKSPACE_ID}/time-entries/{entry['id']}"
-        requests.delete(delete_url, headers=HEADERS)
+        SESSION.delete(delete_url, headers=HEADERS)
         return
 
     # Generate all 8 PM and 9 AM cutoffs between start and end time
@@ -122,8 +213,8 @@ def adjust_night_entry(entry: Dict[str, Any]) -> None:
     current_segment_start = start_time
 
     while current_date <= end_time.date():
-        # Skip processing if it's a weekend
-        if current_date.weekday() >= 5:
+        # Skip processing if it's not a working day
+        if not calendar.is_workday(current_date):
             current_date += timedelta(days=1)
             continue
 
@@ -180,13 +271,13 @@ def adjust_night_entry(entry: Dict[str, Any]) -> None:
     # Delete the original entry
     delete_url = f"{BASE_URL}/workspaces/{WORKSPACE_ID}/time-entries/{entry['id']}"
     logging.info(f"Deleting original entry: {entry['id']}")
-    requests.delete(delete_url, headers=HEADERS)
+    SESSION.delete(delete_url, headers=HEADERS)
 
     # Create the new entries
     logging.info(f"Creating {len(entries_to_create)} new segments")
     for new_entry in entries_to_create:
         create_url = f"{BASE_URL}/workspaces/{WORKSPACE_ID}/time-entries"
-        requests.post(create_url, headers=HEADERS, json=new_entry)
+        SESSION.post(create_url, headers=HEADERS, json=new_entry)
 
 
 def split_time_entry(
@@ -267,12 +358,12 @@ def split_time_entry(
                 delete_url = (
                     f"{BASE_URL}/workspaces/{WORKSPACE_ID}/time-entries/{entry['id']}"
                 )
-                requests.delete(delete_url, headers=HEADERS)
+                SESSION.delete(delete_url, headers=HEADERS)
 
             # Create the new entries via API
             for new_entry_item in new_entries_list:
                 create_url = f"{BASE_URL}/workspaces/{WORKSPACE_ID}/time-entries"
-                requests.post(create_url, headers=HEADERS, json=new_entry_item)
+                SESSION.post(create_url, headers=HEADERS, json=new_entry_item)
         else:
             # Add to the provided list
             if entries_to_create is not None:
@@ -295,7 +386,12 @@ def split_time_entry(
             )
 
 
-def get_default_project() -> Optional[str]:
+# Default project per workspace, looked up once per process (the daemon reuses it)
+_default_projects: Dict[str, str] = {}
+FALLBACK_PROJECT_ID = "6571c5455e233f2fc06a3b24"
+
+
+def get_default_project(connection: Optional[Connection] = None) -> Optional[str]:
     """fallback method :
     1. Via l'interface web (en inspectant lURL)
 
@@ -311,20 +407,36 @@ def get_default_project() -> Optional[str]:
 
         Le morceau après /projects/ (jusqu'au prochain /) correspond à l'ID de votre projet.
     """
-    url = f"{BASE_URL}/workspaces/{WORKSPACE_ID}/projects"
-    response = requests.get(url, headers=HEADERS)
+    connection = connection or current_connection()
+    cached = _default_projects.get(connection.workspace_id or "")
+    if cached is not None:
+        return cached
+    url = f"{BASE_URL}/workspaces/{connection.workspace_id}/projects"
+    response = connection.session.get(url, headers=connection.headers)
     response.raise_for_status()
     projects = response.json()
-    return (
-        projects[0]["id"] if projects else None
-    )  # marche pas avec shiroo, certains id sont hidden
+    if not projects:
+        return None  # not cached, the next entry asks again
+    # marche pas avec shiroo, certains id sont hidden
+    _default_projects[connection.workspace_id or ""] = projects[0]["id"]
+    return projects[0]["id"]
 
 
 def create_time_entry(
-    start_time: datetime.datetime, end_time: datetime.datetime, description: str
+    start_time: datetime.datetime,
+    end_time: datetime.datetime,
+    description: str,
+    project_id: Optional[str] = None,
+    connection: Optional[Connection] = None,
 ) -> None:
-    create_url = f"{BASE_URL}/workspaces/{WORKSPACE_ID}/time-entries"
-    project_id = "6571c5455e233f2fc06a3b24"  # Consider making this configurable or using get_default_project()
+    connection = connection or current_connection()
+    create_url = f"{BASE_URL}/workspaces/{connection.workspace_id}/time-entries"
+    if project_id is None:
+        try:
+            project_id = get_default_project(connection)
+        except requests.RequestException as e:
+            logging.warning(f"Project lookup failed, using the fallback project: {e}")
+        project_id = project_id or FALLBACK_PROJECT_ID
 
     # Ensure times are in UTC and correct format for Clockify API
     start_utc_str = start_time.astimezone(datetime.timezone.utc).strftime(
@@ -341,13 +453,36 @@ def create_time_entry(
         "projectId": project_id,
         "tagIds": [],
     }
-    response = requests.post(create_url, headers=HEADERS, json=payload)
+    response = connection.session.post(
+        create_url, headers=connection.headers, json=payload
+    )
     response.raise_for_status()
     logging.info(
         f"Created entry: '{description}' from {start_time.strftime('%H:%M')} to {end_time.strftime('%H:%M')}"
     )
 
 
+def is_workday(target_date_obj: datetime.date) -> bool:
+    """Check the work calendar (weekends, French holidays, leave file) and log skips."""
+    calendar = get_calendar()
+    if calendar.is_workday(target_date_obj):
+        return True
+    logging.info(
+        f"Skipping {target_date_obj.isoformat()}: {calendar.reason(target_date_obj)}"
+    )
+    return False
+
+
+def is_blocked(start_time: datetime.datetime, end_time: datetime.datetime) -> bool:
+    """True if the entry overlaps a blocked window of the leave file."""
+    if get_calendar().is_blocked(start_time.date(), start_time.time(), end_time.time()):
+        logging.info(
+            f"Skipping blocked slot {start_time.strftime('%H:%M')}-{end_time.strftime('%H:%M')}"
+        )
+        return True
+    return False
+
+
 def add_morning_schedule(target_date_obj: datetime.date) -> None:
     """Adds standard morning meetings and start of day entry for the given date."""
     logging.info(f"Adding morning schedule for {target_date_obj.isoformat()}")
@@ -380,13 +515,38 @@ def add_morning_schedule(target_date_obj: datetime.date) -> None:
         },
     ]
 
+    # With a calendar rules file, the real meetings come from Google Calendar:
+    # the morning ones now, the afternoon ones with add_afternoon_meetings
+    from calendar_sync import fill_start_of_day, rules_file, sync_calendar
+
+    if rules_file().exists():
+        connection = current_connection()
+        sync_calendar(target_date_obj, target_date_obj, connection, before=LUNCH_START)
+        fill_start_of_day(connection, start_day, "Start of Day", LUNCH_START)
+        return
+
     # Create start of day entry
     if meetings:  # Ensure there's a meeting to mark the end of "Start of Day"
-        create_time_entry(start_day, meetings[0]["start"], "Start of Day")
+        if not is_blocked(start_day, meetings[0]["start"]):
+            create_time_entry(start_day, meetings[0]["start"], "Start of Day")
 
     # Create meeting entries
     for meeting in meetings:
-        create_time_entry(meeting["start"], meeting["end"], meeting["description"])
+        if not is_blocked(meeting["start"], meeting["end"]):
+            create_time_entry(meeting["start"], meeting["end"], meeting["description"])
+
+
+def add_afternoon_meetings(target_date_obj: datetime.date) -> None:
+    """With a calendar rules file, adds the day's meetings not logged yet.
+
+    Run late in the day, so afternoon meetings are logged once they took place
+    rather than from the morning's view of the calendar.
+    """
+    from calendar_sync import rules_file, sync_calendar
+
+    if rules_file().exists():
+        logging.info(f"Adding calendar meetings for {target_date_obj.isoformat()}")
+        sync_calendar(target_date_obj, target_date_obj, current_connection())
 
 
 def add_hpfo_task(target_date_obj: datetime.date) -> None:
@@ -405,6 +565,8 @@ def add_hpfo_task(target_date_obj: datetime.date) -> None:
         tzinfo=ZoneInfo(TIMEZONE),
     )
     end_time = start_time + timedelta(minutes=15)
+    if is_blocked(start_time, end_time):
+        return
 
     # Using the specific project ID for HPFO as in the original script
     hpfo_project_id = "60c9a33e33cb7c4047062b35"
@@ -424,7 +586,7 @@ def add_hpfo_task(target_date_obj: datetime.date) -> None:
         "tagIds": [],
     }
     create_url = f"{BASE_URL}/workspaces/{WORKSPACE_ID}/time-entries"
-    response = requests.post(create_url, headers=HEADERS, json=payload)
+    response = SESSION.post(create_url, headers=HEADERS, json=payload)
     response.raise_for_status()
     logging.info(
         f"Created HPFO entry: {start_time.strftime('%H:%M')} to {end_time.strftime('%H:%M')}"
@@ -432,39 +594,115 @@ def add_hpfo_task(target_date_obj: datetime.date) -> None:
 
 
 def autofill_workday(target_date_obj: datetime.date) -> None:
-    """Autofills a standard workday (9:00-12:00 and 12:30-17:00) for the given date."""
-    logging.info(f"Autofilling standard workday for {target_date_obj.isoformat()}")
+    """Autofills a standard workday (9:00-12:00 and 12:30-17:00) for the given date.
 
-    work_start_morning = datetime.datetime.combine(
-        target_date_obj, datetime.time(9, 0), tzinfo=ZoneInfo(TIMEZONE)
-    )
-    lunch_start = datetime.datetime.combine(
-        target_date_obj, datetime.time(12, 0), tzinfo=ZoneInfo(TIMEZONE)
-    )
-    lunch_end = datetime.datetime.combine(
-        target_date_obj, datetime.time(12, 30), tzinfo=ZoneInfo(TIMEZONE)
-    )
-    work_end_afternoon = datetime.datetime.combine(
-        target_date_obj, datetime.time(17, 0), tzinfo=ZoneInfo(TIMEZONE)
-    )
+    Blocked windows from the leave file are cut out of both halves. With
+    CLOCKIFY_SCHEDULE_TEMPLATE and a calendar rules file, the day comes from the
+    template's occurrences instead.
+    """
+    from calendar_sync import rules_file, schedule_template_file, sync_calendar
+
+    template = schedule_template_file()
+    if template is not None and rules_file().exists():
+        logging.info(f"Autofilling {target_date_obj.isoformat()} from {template}")
+        sync_calendar(
+            target_date_obj, target_date_obj, current_connection(), template=template
+        )
+        return
 
-    create_time_entry(work_start_morning, lunch_start, "Work")
-    create_time_entry(lunch_end, work_end_afternoon, "Work")
+    logging.info(f"Autofilling standard workday for {target_date_obj.isoformat()}")
+
+    calendar = get_calendar()
+    for half_start, half_end in [
+        (datetime.time(9, 0), datetime.time(12, 0)),
+        (datetime.time(12, 30), datetime.time(17, 0)),
+    ]:
+        for start, end in calendar.free_windows(target_date_obj, half_start, half_end):
+            create_time_entry(
+                datetime.datetime.combine(
+                    target_date_obj, start, tzinfo=ZoneInfo(TIMEZONE)
+                ),
+                datetime.datetime.combine(
+                    target_date_obj, end, tzinfo=ZoneInfo(TIMEZONE)
+                ),
+                "Work",
+            )
     logging.info(f"Completed autofill for {target_date_obj.isoformat()}")
 
 
-def main() -> None:
-    # Choose function to run based on environment or argument
-    action = os.getenv("CLOCKIFY_ACTION", "daily")
+def run_daemon() -> None:
+    """Stay resident and run the daily actions on cron-like schedules.
+
+    The pooled SESSION and cached metadata are reused between runs, and a
+    JSON status page is served on localhost (CLOCKIFY_STATUS_PORT).
+    """
+    from scheduler import CronSchedule, Scheduler, serve_status
+
+    def today() -> datetime.date:
+        return datetime.datetime.now(ZoneInfo(TIMEZONE)).date()
+
+    def on_workday(func: Callable[[datetime.date], None]) -> Callable[[], None]:
+        def run() -> None:
+            if is_workday(today()):
+                func(today())
+
+        return run
+
+    actions = {
+        "morning_schedule": on_workday(add_morning_schedule),
+        "hpfo_task": on_workday(add_hpfo_task),
+        "afternoon_meetings": on_workday(add_afternoon_meetings),
+        "remove_nights": remove_night_entries,
+    }
+
+    scheduler = Scheduler()
+    for name, func in actions.items():
+        expression = os.getenv(f"CLOCKIFY_CRON_{name.upper()}", DEFAULT_SCHEDULES[name])
+        scheduler.add_job(name, CronSchedule(expression, TIMEZONE), func)
+        logging.info(f"Scheduled {name} with '{expression}'")
+
+    port = int(os.getenv("CLOCKIFY_STATUS_PORT", DEFAULT_STATUS_PORT))
+    server = serve_status(scheduler, port)
+    try:
+        scheduler.run_forever()
+    except KeyboardInterrupt:
+        logging.info("Stopping daemon")
+    finally:
+        scheduler.stop()
+        server.shutdown()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    configure()
+
+    # Choose function to run based on argument or environment
+    parser = argparse.ArgumentParser(description="Manage Clockify time entries")
+    parser.add_argument(
+        "action",
+        nargs="?",
+        choices=ACTIONS,
+        default=os.getenv("CLOCKIFY_ACTION", "daily"),
+    )
+    parser.add_argument(
+        "--date",
+        default=os.getenv("CLOCKIFY_DATE"),
+        help="YYYY-MM-DD, for autofill_specific_date",
+    )
+    args = parser.parse_args(argv)
+    action = args.action
     today_date_obj = datetime.datetime.now(ZoneInfo(TIMEZONE)).date()  # date object
 
     if action == "remove_nights":
         remove_night_entries()
+    elif action == "audit":
+        audit_night_entries()
+    elif action == "daemon":
+        run_daemon()
     elif action == "autofill_specific_date":
-        date_str = os.getenv("CLOCKIFY_DATE")
+        date_str = args.date
         if not date_str:
             logging.error(
-                "CLOCKIFY_DATE environment variable not set for autofill_specific_date action."
+                "CLOCKIFY_DATE environment variable or --date not set for autofill_specific_date action."
             )
             return
         try:
@@ -476,18 +714,22 @@ def main() -> None:
             )
             return
 
-        if target_date_obj.weekday() >= 5:  # Monday is 0 and Sunday is 6
-            logging.info(
-                f"Skipping autofill for weekend date: {target_date_obj.isoformat()}"
-            )
+        if not is_workday(target_date_obj):
             return
 
         autofill_workday(target_date_obj)
     else:  # Default "daily" action
+        if not is_workday(today_date_obj):
+            return
         logging.info(f"Running daily schedule for {today_date_obj.isoformat()}")
         add_morning_schedule(today_date_obj)
+        add_afternoon_meetings(today_date_obj)
         add_hpfo_task(today_date_obj)
 
 
 if __name__ == "__main__":
-    main()
+    # Run the imported module rather than __main__, so that clockify_reports and
+    # calendar_sync (which import clockify) share its configured credentials
+    import clockify
+
+    clockify.main()
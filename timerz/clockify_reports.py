@@ -0,0 +1,279 @@
+import csv
+import argparse
+import datetime
+import logging
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+from entry_arrays import COLUMNS, VIOLATIONS, EntryArrays, Row, entry_row
+from workdays import get_calendar
+
+if TYPE_CHECKING:
+    import clockify
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional, compact CSV chunks are used instead
+    pa = None
+    pq = None
+
+TIMEZONE = "Europe/Paris"
+PARQUET_FILE = "entries.parquet"
+CSV_CHUNK_PATTERN = "entries-*.csv"
+REPORTS = ["day", "project", "violations"]
+# Same range as remove_night_entries in clockify.py
+AUDIT_DAYS = 14
+
+
+def _parquet_schema():
+    return pa.schema(
+        [
+            ("id", pa.string()),
+            ("user_id", pa.string()),
+            ("project_id", pa.string()),
+            ("description", pa.string()),
+            ("start", pa.timestamp("s", tz="UTC")),
+            ("end", pa.timestamp("s", tz="UTC")),
+            ("duration", pa.int64()),
+        ]
+    )
+
+
+def _clear_export(output: Path) -> None:
+    for old in [output / PARQUET_FILE, *output.glob(CSV_CHUNK_PATTERN)]:
+        old.unlink(missing_ok=True)
+
+
+def export_entries(
+    pages: Iterable[List[dict]], output: Path, output_format: str = "parquet"
+) -> int:
+    """Stream pages of Clockify entries into Parquet or one CSV chunk per page."""
+    if output_format == "parquet" and pa is None:
+        logging.warning("pyarrow is not installed, exporting CSV chunks instead")
+        output_format = "csv"
+    output.mkdir(parents=True, exist_ok=True)
+    _clear_export(output)
+
+    exported = 0
+    writer = None
+    try:
+        for page_number, page in enumerate(pages):
+            rows = [row for row in map(entry_row, page) if row is not None]
+            exported += len(rows)
+            if output_format == "parquet":
+                schema = _parquet_schema()
+                if writer is None:
+                    writer = pq.ParquetWriter(output / PARQUET_FILE, schema)
+                columns = list(zip(*rows)) if rows else [[]] * len(COLUMNS)
+                arrays = [
+                    pa.array(column, type=field.type)
+                    for column, field in zip(columns, schema)
+                ]
+                writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            else:
+                chunk = output / f"entries-{page_number:05d}.csv"
+                with open(chunk, "w", newline="", encoding="utf-8") as f:
+                    csv_writer = csv.writer(f)
+                    csv_writer.writerow(COLUMNS)
+                    csv_writer.writerows(rows)
+            logging.info(f"Exported page {page_number + 1} ({len(rows)} entries)")
+    finally:
+        if writer is not None:
+            writer.close()
+    return exported
+
+
+def _read_csv_rows(chunks: List[Path]) -> Iterable[Row]:
+    for chunk in chunks:
+        with open(chunk, newline="", encoding="utf-8") as f:
+            reader = csv.reader(f)
+            next(reader)
+            for id_, user, project, description, start, end, duration in reader:
+                yield (
+                    id_,
+                    user,
+                    project,
+                    description,
+                    int(start),
+                    int(end),
+                    int(duration),
+                )
+
+
+def load_entries(export_dir: Path) -> EntryArrays:
+    """Load an export written by export_entries as column arrays."""
+    parquet_path = export_dir / PARQUET_FILE
+    if parquet_path.exists():
+        if pq is None:
+            raise RuntimeError("pyarrow is required to read a Parquet export")
+        table = pq.read_table(parquet_path)
+
+        def strings(name: str) -> np.ndarray:
+            return table[name].to_numpy(zero_copy_only=False).astype(object)
+
+        def epochs(name: str) -> np.ndarray:
+            # Parquet stores the timestamps in ms, bring them back to seconds
+            seconds = table[name].cast(pa.timestamp("s", tz="UTC"))
+            return seconds.cast(pa.int64()).to_numpy()
+
+        return EntryArrays(
+            ids=strings("id"),
+            user_ids=strings("user_id"),
+            project_ids=strings("project_id"),
+            descriptions=strings("description"),
+            start=epochs("start"),
+            end=epochs("end"),
+        )
+    chunks = sorted(export_dir.glob(CSV_CHUNK_PATTERN))
+    return EntryArrays.from_rows(_read_csv_rows(chunks))
+
+
+def print_report(entries: EntryArrays, report: str) -> None:
+    if report == "day":
+        days, hours = entries.hours_per_day(TIMEZONE)
+        for day, total in zip(days, hours):
+            print(f"{day}  {total:>6.2f} h")
+        print(f"Total: {hours.sum():.2f} h over {len(days)} days")
+    elif report == "project":
+        projects, hours = entries.hours_per_project()
+        for index in np.argsort(-hours):
+            print(f"{projects[index] or '(no project)':<26} {hours[index]:>8.2f} h")
+    else:
+        seconds = entries.violation_seconds(TIMEZONE, get_calendar().is_workday)
+        for kind, values in seconds.items():
+            print(
+                f"{kind:<8} {np.count_nonzero(values):>5} entries"
+                f"  {values.sum() / 3600:>8.2f} h"
+            )
+
+
+def print_audit(entries: EntryArrays) -> None:
+    """Violating minutes per user and day, as enforced by remove_nights."""
+    users, days, minutes = entries.violations_per_user_day(
+        TIMEZONE, get_calendar().is_workday
+    )
+    print(f"{'user':<26} {'day':<10} " + " ".join(f"{k:>8}" for k in VIOLATIONS))
+    for index, (user, day) in enumerate(zip(users, days)):
+        values = " ".join(f"{minutes[k][index]:>8.0f}" for k in VIOLATIONS)
+        print(f"{user or '(no user)':<26} {str(day):<10} {values}")
+    totals = " ".join(f"{minutes[k].sum():>8.0f}" for k in VIOLATIONS)
+    print(f"{'Total (minutes)':<37} {totals}")
+    print(f"{len(days)} user-days with violations out of {len(entries)} entries")
+
+
+def _api_range(
+    first_day: datetime.date, last_day: datetime.date
+) -> Tuple[datetime.datetime, datetime.datetime]:
+    tz = ZoneInfo(TIMEZONE)
+    start = datetime.datetime.combine(first_day, datetime.time(0, 0), tzinfo=tz)
+    end = datetime.datetime.combine(last_day, datetime.time(23, 59, 59), tzinfo=tz)
+    return start, end
+
+
+def fetch_entries(
+    first_day: datetime.date, last_day: datetime.date, connection: "clockify.Connection"
+) -> EntryArrays:
+    """Download a date range straight into column arrays."""
+    import clockify
+
+    pages = clockify.iter_time_entries(*_api_range(first_day, last_day), connection)
+    return EntryArrays.from_rows(
+        row for page in pages for row in map(entry_row, page) if row is not None
+    )
+
+
+def _between(
+    entries: EntryArrays,
+    first_day: Optional[datetime.date],
+    last_day: Optional[datetime.date],
+) -> EntryArrays:
+    if first_day is None and last_day is None:
+        return entries
+    return entries.between(
+        first_day or datetime.date.min, last_day or datetime.date.max, TIMEZONE
+    )
+
+
+def _parse_date(value: str) -> datetime.date:
+    return datetime.date.fromisoformat(value)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S",
+    )
+    parser = argparse.ArgumentParser(
+        description="Export Clockify entries to columnar files and report on them"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="download a date range")
+    export_parser.add_argument("--start", type=_parse_date, required=True)
+    export_parser.add_argument("--end", type=_parse_date, required=True)
+    export_parser.add_argument("--output", type=Path, required=True)
+    export_parser.add_argument(
+        "--format", choices=["parquet", "csv"], default="parquet"
+    )
+
+    report_parser = subparsers.add_parser("report", help="aggregate an export")
+    report_parser.add_argument("export_dir", type=Path)
+    report_parser.add_argument("--by", choices=REPORTS, default="day")
+    report_parser.add_argument("--start", type=_parse_date)
+    report_parser.add_argument("--end", type=_parse_date)
+
+    audit_parser = subparsers.add_parser(
+        "audit",
+        help="read-only count of night/weekend/lunch/holiday minutes per user and day",
+    )
+    audit_parser.add_argument(
+        "export_dir",
+        nargs="?",
+        type=Path,
+        help="audit an export instead of downloading the range",
+    )
+    audit_parser.add_argument("--start", type=_parse_date)
+    audit_parser.add_argument("--end", type=_parse_date)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        # Only export and audit without an export_dir talk to the API
+        import clockify
+
+        clockify.configure()
+        count = export_entries(
+            clockify.iter_time_entries(
+                *_api_range(args.start, args.end), clockify.current_connection()
+            ),
+            args.output,
+            args.format,
+        )
+        logging.info(f"Exported {count} entries to {args.output}")
+    elif args.command == "audit":
+        if args.export_dir:
+            entries = load_entries(args.export_dir)
+            entries = _between(entries, args.start, args.end)
+        else:
+            import clockify
+
+            clockify.configure()
+            last_day = args.end or datetime.datetime.now(ZoneInfo(TIMEZONE)).date()
+            first_day = args.start or last_day - datetime.timedelta(days=AUDIT_DAYS)
+            entries = fetch_entries(
+                first_day, last_day, clockify.current_connection()
+            )
+        print_audit(entries)
+    else:
+        entries = load_entries(args.export_dir)
+        entries = _between(entries, args.start, args.end)
+        print_report(entries, args.by)
+
+
+if __name__ == "__main__":
+    main()
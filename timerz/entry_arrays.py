@@ -0,0 +1,253 @@
+import datetime
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+DAY = 86400
+WEEK = 7 * DAY
+# 1970-01-01 was a Thursday, so an epoch week starts on Thursday
+SATURDAY = 2 * DAY
+MONDAY = 4 * DAY
+
+# Same rules as adjust_night_entry and split_time_entry in clockify.py
+DAYTIME_WINDOW = (9 * 3600, 20 * 3600)
+LUNCH_WINDOW = (12 * 3600, 12 * 3600 + 30 * 60)
+VIOLATIONS = ["night", "weekend", "lunch", "holiday"]
+EPOCH = datetime.date(1970, 1, 1)
+
+COLUMNS = ["id", "user_id", "project_id", "description", "start", "end", "duration"]
+
+Row = Tuple[str, str, str, str, int, int, int]
+
+
+def parse_utc(value: str) -> int:
+    """Clockify timestamps ("2025-05-12T07:15:00Z") to epoch seconds."""
+    parsed = datetime.datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return int(parsed.timestamp())
+
+
+def entry_row(entry: Dict[str, Any]) -> Optional[Row]:
+    """Flatten a Clockify entry; running timers (no end) are skipped."""
+    interval = entry.get("timeInterval") or {}
+    if not interval.get("start") or not interval.get("end"):
+        return None
+    start = parse_utc(interval["start"])
+    end = parse_utc(interval["end"])
+    return (
+        entry.get("id") or "",
+        entry.get("userId") or "",
+        entry.get("projectId") or "",
+        entry.get("description") or "",
+        start,
+        end,
+        end - start,
+    )
+
+
+def local_times(epochs: np.ndarray, timezone: str) -> np.ndarray:
+    """Shift UTC epochs to wall-clock seconds, one offset lookup per distinct hour."""
+    if len(epochs) == 0:
+        return epochs.copy()
+    tz = ZoneInfo(timezone)
+    hours, inverse = np.unique(epochs // 3600, return_inverse=True)
+    offsets = np.array(
+        [
+            datetime.datetime.fromtimestamp(int(h) * 3600, tz).utcoffset()
+            // datetime.timedelta(seconds=1)
+            for h in hours
+        ],
+        dtype=np.int64,
+    )
+    return epochs + offsets[inverse]
+
+
+def periodic_overlap(
+    start: np.ndarray,
+    end: np.ndarray,
+    period: int,
+    windows: Sequence[Tuple[int, int]],
+) -> np.ndarray:
+    """Seconds of each [start, end) falling in windows repeating every period.
+
+    Uses the closed form "covered(end) - covered(start)", so entries spanning
+    many days cost the same as short ones.
+    """
+    total = np.zeros(len(start), dtype=np.int64)
+    for low, high in windows:
+        width = high - low
+
+        def covered(t: np.ndarray) -> np.ndarray:
+            return (t // period) * width + np.clip(t % period - low, 0, width)
+
+        total += covered(end) - covered(start)
+    return total
+
+
+@dataclass
+class EntryArrays:
+    """Time entries as columns: string ids plus int64 UTC epoch seconds."""
+
+    ids: np.ndarray
+    user_ids: np.ndarray
+    project_ids: np.ndarray
+    descriptions: np.ndarray
+    start: np.ndarray
+    end: np.ndarray
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Row]) -> "EntryArrays":
+        rows = list(rows)
+        columns: List[Any] = list(zip(*rows)) if rows else [()] * len(COLUMNS)
+        return cls(
+            ids=np.array(columns[0], dtype=object),
+            user_ids=np.array(columns[1], dtype=object),
+            project_ids=np.array(columns[2], dtype=object),
+            descriptions=np.array(columns[3], dtype=object),
+            start=np.array(columns[4], dtype=np.int64),
+            end=np.array(columns[5], dtype=np.int64),
+        )
+
+    def __len__(self) -> int:
+        return len(self.start)
+
+    @property
+    def duration(self) -> np.ndarray:
+        return self.end - self.start
+
+    def select(self, mask: np.ndarray) -> "EntryArrays":
+        return EntryArrays(
+            self.ids[mask],
+            self.user_ids[mask],
+            self.project_ids[mask],
+            self.descriptions[mask],
+            self.start[mask],
+            self.end[mask],
+        )
+
+    def between(
+        self, first_day: datetime.date, last_day: datetime.date, timezone: str
+    ) -> "EntryArrays":
+        """Entries starting on a local date within [first_day, last_day]."""
+        days = local_times(self.start, timezone) // DAY
+        low = (first_day - datetime.date(1970, 1, 1)).days
+        high = (last_day - datetime.date(1970, 1, 1)).days
+        return self.select((days >= low) & (days <= high))
+
+    def hours_per_day(self, timezone: str) -> Tuple[np.ndarray, np.ndarray]:
+        """(local datetime64[D] dates, hours), entries counted on their start day."""
+        days = local_times(self.start, timezone) // DAY
+        unique_days, inverse = np.unique(days, return_inverse=True)
+        hours = np.bincount(inverse, weights=self.duration, minlength=len(unique_days))
+        return unique_days.astype("datetime64[D]"), hours / 3600
+
+    def hours_per_project(self) -> Tuple[np.ndarray, np.ndarray]:
+        projects, inverse = np.unique(self.project_ids.astype(str), return_inverse=True)
+        hours = np.bincount(inverse, weights=self.duration, minlength=len(projects))
+        return projects, hours / 3600
+
+    def _off_weekdays(
+        self,
+        start: np.ndarray,
+        end: np.ndarray,
+        is_workday: Callable[[datetime.date], bool],
+    ) -> np.ndarray:
+        """Entries starting or ending on a weekday that is a holiday or leave.
+
+        is_workday is asked once per distinct local date, not once per entry.
+        """
+        start_days = start // DAY
+        end_days = end // DAY
+        days = np.unique(np.concatenate([start_days, end_days]))
+        off = np.array(
+            [
+                date.weekday() < 5 and not is_workday(date)
+                for date in (EPOCH + datetime.timedelta(days=int(d)) for d in days)
+            ],
+            dtype=bool,
+        )
+        return (
+            off[np.searchsorted(days, start_days)]
+            | off[np.searchsorted(days, end_days)]
+        )
+
+    def violation_seconds(
+        self,
+        timezone: str,
+        is_workday: Optional[Callable[[datetime.date], bool]] = None,
+    ) -> Dict[str, np.ndarray]:
+        """Per-entry seconds worked at night (weekdays 20:00-09:00), on weekends
+        and during the weekday lunch break (12:00-12:30).
+
+        With is_workday (workdays.get_calendar().is_workday), an entry starting
+        or ending on a public holiday or leave day is deleted by remove_nights,
+        so all of it counts as "holiday" and none of it under the other kinds.
+        Windows are measured on the wall clock, so an entry spanning a DST change
+        is off by that hour.
+        """
+        start = local_times(self.start, timezone)
+        end = local_times(self.end, timezone)
+        sunday = SATURDAY + DAY
+
+        def weekend_part(window: Tuple[int, int]) -> np.ndarray:
+            low, high = window
+            return periodic_overlap(
+                start,
+                end,
+                WEEK,
+                [(SATURDAY + low, SATURDAY + high), (sunday + low, sunday + high)],
+            )
+
+        weekend = periodic_overlap(start, end, WEEK, [(SATURDAY, MONDAY)])
+        daytime = periodic_overlap(start, end, DAY, [DAYTIME_WINDOW])
+        lunch = periodic_overlap(start, end, DAY, [LUNCH_WINDOW])
+        # Nights and lunches falling on a weekend are already counted as weekend work
+        night = (end - start) - daytime - (weekend - weekend_part(DAYTIME_WINDOW))
+        seconds = {
+            "night": np.maximum(night, 0),
+            "weekend": weekend,
+            "lunch": lunch - weekend_part(LUNCH_WINDOW),
+            "holiday": np.zeros(len(start), dtype=np.int64),
+        }
+        if is_workday is not None and len(start):
+            off = self._off_weekdays(start, end, is_workday)
+            for kind in ("night", "weekend", "lunch"):
+                seconds[kind] = np.where(off, 0, seconds[kind])
+            seconds["holiday"] = np.where(off, end - start, 0)
+        return seconds
+
+    def violations_per_user_day(
+        self,
+        timezone: str,
+        is_workday: Optional[Callable[[datetime.date], bool]] = None,
+    ) -> Tuple[np.ndarray, np.ndarray, Dict[str, np.ndarray]]:
+        """Violating minutes grouped by (user, local start day).
+
+        Returns the users, datetime64[D] days and per-kind minutes of every group
+        with at least one violating second, sorted by user then day.
+        """
+        seconds = self.violation_seconds(timezone, is_workday)
+        if len(self) == 0:
+            no_minutes = {kind: np.zeros(0) for kind in seconds}
+            return np.array([], dtype=object), np.array([], "datetime64[D]"), no_minutes
+
+        users, user_index = np.unique(self.user_ids.astype(str), return_inverse=True)
+        days = local_times(self.start, timezone) // DAY
+        first_day = days.min()
+        span = int(days.max() - first_day) + 1
+        keys, group = np.unique(
+            user_index.astype(np.int64) * span + (days - first_day),
+            return_inverse=True,
+        )
+        minutes = {
+            kind: np.bincount(group, weights=values, minlength=len(keys)) / 60
+            for kind, values in seconds.items()
+        }
+        violating = np.logical_or.reduce([m > 0 for m in minutes.values()])
+        keys = keys[violating]
+        return (
+            users[keys // span],
+            (keys % span + first_day).astype("datetime64[D]"),
+            {kind: values[violating] for kind, values in minutes.items()},
+        )
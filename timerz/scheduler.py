@@ -0,0 +1,180 @@
+import json
+import logging
+import datetime
+import threading
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Set
+from zoneinfo import ZoneInfo
+
+# Field ranges of a 5-field cron expression: minute hour day-of-month month day-of-week
+CRON_FIELDS = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 7)]
+MAX_SEARCH_DAYS = 366 * 5
+
+
+def _parse_cron_field(field: str, low: int, high: int) -> Set[int]:
+    values: Set[int] = set()
+    for part in field.split(","):
+        step = 1
+        if "/" in part:
+            part, step_str = part.split("/", 1)
+            step = int(step_str)
+        if part == "*":
+            start, end = low, high
+        elif "-" in part:
+            start_str, end_str = part.split("-", 1)
+            start, end = int(start_str), int(end_str)
+        else:
+            start = end = int(part)
+            if step != 1:
+                end = high
+        if start < low or end > high or start > end or step < 1:
+            raise ValueError(f"Invalid cron field: {field}")
+        values.update(range(start, end + 1, step))
+    return values
+
+
+class CronSchedule:
+    """Minimal 5-field cron expression (e.g. "0 9 * * 1-5"), evaluated in a timezone."""
+
+    def __init__(self, expression: str, timezone: str) -> None:
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression needs 5 fields: {expression}")
+        self.expression = expression
+        self.tz = ZoneInfo(timezone)
+        parsed = [
+            _parse_cron_field(field, low, high)
+            for field, (low, high) in zip(fields, CRON_FIELDS)
+        ]
+        self.minutes, self.hours, self.days, self.months, weekdays = parsed
+        # Cron counts weekdays from Sunday (0 or 7), Python from Monday
+        self.weekdays = {(d - 1) % 7 for d in weekdays}
+        self.days_restricted = fields[2] != "*"
+        self.weekdays_restricted = fields[4] != "*"
+
+    def _day_matches(self, day: datetime.date) -> bool:
+        if day.month not in self.months:
+            return False
+        day_ok = day.day in self.days
+        weekday_ok = day.weekday() in self.weekdays
+        # Like cron, a restricted day-of-month and day-of-week match on either
+        if self.days_restricted and self.weekdays_restricted:
+            return day_ok or weekday_ok
+        return day_ok and weekday_ok
+
+    def next_after(self, after: datetime.datetime) -> datetime.datetime:
+        local = after.astimezone(self.tz)
+        day = local.date()
+        earliest = (local.hour, local.minute + 1)
+        for _ in range(MAX_SEARCH_DAYS):
+            if self._day_matches(day):
+                for hour in sorted(self.hours):
+                    for minute in sorted(self.minutes):
+                        if (hour, minute) >= earliest:
+                            return datetime.datetime.combine(
+                                day, datetime.time(hour, minute), tzinfo=self.tz
+                            )
+            day += timedelta(days=1)
+            earliest = (0, 0)
+        raise ValueError(f"Cron expression never fires: {self.expression}")
+
+
+class Job:
+    def __init__(self, name: str, schedule: CronSchedule, func: Callable[[], None]):
+        self.name = name
+        self.schedule = schedule
+        self.func = func
+        self.next_run = schedule.next_after(datetime.datetime.now(schedule.tz))
+        self.last_run: Optional[datetime.datetime] = None
+        self.last_status = "pending"
+        self.last_error: Optional[str] = None
+        self.runs = 0
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "schedule": self.schedule.expression,
+            "next_run": self.next_run.isoformat(),
+            "last_run": self.last_run.isoformat() if self.last_run else None,
+            "last_status": self.last_status,
+            "last_error": self.last_error,
+            "runs": self.runs,
+        }
+
+
+class Scheduler:
+    """Runs jobs on their cron schedules in a single resident process."""
+
+    def __init__(self) -> None:
+        self.jobs: List[Job] = []
+        self.started_at = datetime.datetime.now(datetime.timezone.utc)
+        self.stop_event = threading.Event()
+        self.lock = threading.Lock()
+
+    def add_job(self, name: str, schedule: CronSchedule, func: Callable[[], None]):
+        self.jobs.append(Job(name, schedule, func))
+
+    def _run(self, job: Job) -> None:
+        logging.info(f"Running scheduled job: {job.name}")
+        try:
+            job.func()
+        except Exception as e:  # keep the daemon alive, the error shows in /status
+            logging.exception(f"Scheduled job {job.name} failed")
+            status, error = "error", str(e)
+        else:
+            status, error = "ok", None
+        now = datetime.datetime.now(job.schedule.tz)
+        with self.lock:
+            job.last_run = now
+            job.last_status = status
+            job.last_error = error
+            job.runs += 1
+            job.next_run = job.schedule.next_after(now)
+        logging.info(f"Next {job.name} run at {job.next_run.isoformat()}")
+
+    def run_forever(self) -> None:
+        while not self.stop_event.is_set():
+            job = min(self.jobs, key=lambda j: j.next_run)
+            now = datetime.datetime.now(job.next_run.tzinfo)
+            delay = (job.next_run - now).total_seconds()
+            if delay > 0:
+                # Wake up at least every minute so clock changes are picked up
+                self.stop_event.wait(min(delay, 60))
+                continue
+            self._run(job)
+
+    def stop(self) -> None:
+        self.stop_event.set()
+
+    def status(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                "started_at": self.started_at.isoformat(),
+                "jobs": [job.status() for job in self.jobs],
+            }
+
+
+def serve_status(scheduler: Scheduler, port: int, host: str = "127.0.0.1"):
+    """Expose scheduler.status() as JSON on http://host:port/status in a thread."""
+
+    class StatusHandler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            if self.path.rstrip("/") not in ("", "/status"):
+                self.send_error(404)
+                return
+            body = json.dumps(scheduler.status(), indent=2).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args: Any) -> None:
+            logging.debug(format % args)
+
+    server = ThreadingHTTPServer((host, port), StatusHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    logging.info(f"Status endpoint listening on http://{host}:{port}/status")
+    return server
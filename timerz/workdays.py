@@ -0,0 +1,211 @@
+import os
+import sys
+import json
+import logging
+import argparse
+import datetime
+from datetime import timedelta
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Leave file, overridable with CLOCKIFY_LEAVE_FILE, e.g.
+# {
+#     "leave": ["2025-08-04..2025-08-22", "2025-12-26"],
+#     "blocked": {"2025-05-13": ["14:00-18:00"]}
+# }
+DEFAULT_LEAVE_FILE = Path(__file__).with_name("leave.json")
+
+Window = Tuple[datetime.time, datetime.time]
+
+
+def easter_sunday(year: int) -> datetime.date:
+    """Gregorian Easter (anonymous algorithm)."""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7  # noqa: E741
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return datetime.date(year, month, day + 1)
+
+
+def french_holidays(year: int) -> Dict[datetime.date, str]:
+    easter = easter_sunday(year)
+    return {
+        datetime.date(year, 1, 1): "Jour de l'an",
+        easter + timedelta(days=1): "Lundi de Pâques",
+        datetime.date(year, 5, 1): "Fête du travail",
+        datetime.date(year, 5, 8): "Victoire 1945",
+        easter + timedelta(days=39): "Ascension",
+        easter + timedelta(days=50): "Lundi de Pentecôte",
+        datetime.date(year, 7, 14): "Fête nationale",
+        datetime.date(year, 8, 15): "Assomption",
+        datetime.date(year, 11, 1): "Toussaint",
+        datetime.date(year, 11, 11): "Armistice",
+        datetime.date(year, 12, 25): "Noël",
+    }
+
+
+def _parse_days(value: str) -> Iterator[datetime.date]:
+    """"YYYY-MM-DD" or an inclusive range "YYYY-MM-DD..YYYY-MM-DD"."""
+    first, _, last = value.partition("..")
+    day = datetime.date.fromisoformat(first.strip())
+    end = datetime.date.fromisoformat(last.strip()) if last else day
+    while day <= end:
+        yield day
+        day += timedelta(days=1)
+
+
+def _parse_window(value: str) -> Window:
+    start, end = (part.strip() for part in value.split("-", 1))
+    return datetime.time.fromisoformat(start), datetime.time.fromisoformat(end)
+
+
+class WorkCalendar:
+    """Working days and blocked windows, precomputed as one table per year.
+
+    Each year is a bytearray indexed by day of year (1 = working day), built on
+    first use, so is_workday() is a lookup instead of a date computation.
+    """
+
+    def __init__(
+        self,
+        leave: Optional[List[datetime.date]] = None,
+        blocked: Optional[Dict[datetime.date, List[Window]]] = None,
+    ) -> None:
+        self.leave = set(leave or [])
+        self.blocked = blocked or {}
+        self.years: Dict[int, bytearray] = {}
+
+    @classmethod
+    def from_file(cls, path: Optional[Path]) -> "WorkCalendar":
+        if path is None or not path.exists():
+            return cls()
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        leave = [day for value in data.get("leave", []) for day in _parse_days(value)]
+        blocked: Dict[datetime.date, List[Window]] = {}
+        for days, windows in data.get("blocked", {}).items():
+            for day in _parse_days(days):
+                blocked.setdefault(day, []).extend(map(_parse_window, windows))
+        logging.info(f"Loaded {len(leave)} leave days from {path}")
+        return cls(leave, blocked)
+
+    def _year(self, year: int) -> bytearray:
+        table = self.years.get(year)
+        if table is None:
+            first = datetime.date(year, 1, 1)
+            size = (datetime.date(year + 1, 1, 1) - first).days
+            holidays = french_holidays(year)
+            table = bytearray(size)
+            for offset in range(size):
+                day = first + timedelta(days=offset)
+                table[offset] = (
+                    day.weekday() < 5 and day not in holidays and day not in self.leave
+                )
+            self.years[year] = table
+        return table
+
+    def is_workday(self, day: datetime.date) -> bool:
+        return bool(self._year(day.year)[day.timetuple().tm_yday - 1])
+
+    def reason(self, day: datetime.date) -> Optional[str]:
+        """Why a day is not worked, None for a working day."""
+        if day.weekday() >= 5:
+            return "weekend"
+        holiday = french_holidays(day.year).get(day)
+        if holiday:
+            return holiday
+        if day in self.leave:
+            return "leave"
+        return None
+
+    def workdays(
+        self, first: datetime.date, last: datetime.date
+    ) -> Iterator[datetime.date]:
+        day = first
+        while day <= last:
+            if self.is_workday(day):
+                yield day
+            day += timedelta(days=1)
+
+    def is_blocked(
+        self, day: datetime.date, start: datetime.time, end: datetime.time
+    ) -> bool:
+        """True if [start, end) overlaps a blocked window of that day."""
+        return any(
+            start < window_end and end > window_start
+            for window_start, window_end in self.blocked.get(day, [])
+        )
+
+    def free_windows(
+        self, day: datetime.date, start: datetime.time, end: datetime.time
+    ) -> List[Window]:
+        """[start, end) minus the blocked windows of that day."""
+        free = [(start, end)]
+        for window_start, window_end in sorted(self.blocked.get(day, [])):
+            remaining = []
+            for free_start, free_end in free:
+                if window_end <= free_start or window_start >= free_end:
+                    remaining.append((free_start, free_end))
+                    continue
+                if free_start < window_start:
+                    remaining.append((free_start, window_start))
+                if window_end < free_end:
+                    remaining.append((window_end, free_end))
+            free = remaining
+        return free
+
+
+# (path, mtime_ns or None when missing) -> calendar built from that version
+_calendar: Optional[Tuple[Tuple[Path, Optional[int]], WorkCalendar]] = None
+
+
+def get_calendar() -> WorkCalendar:
+    """Calendar from CLOCKIFY_LEAVE_FILE (default timerz/leave.json).
+
+    Rebuilt only when the file changes, so a resident daemon picks up leave
+    added after it started for the cost of one stat per call.
+    """
+    global _calendar
+    path = Path(os.getenv("CLOCKIFY_LEAVE_FILE", DEFAULT_LEAVE_FILE))
+    try:
+        key = (path, path.stat().st_mtime_ns)
+    except OSError:
+        key = (path, None)
+    if _calendar is None or _calendar[0] != key:
+        _calendar = (key, WorkCalendar.from_file(path))
+    return _calendar[1]
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Print the working days of a range (one YYYY-MM-DD per line)"
+    )
+    parser.add_argument("start", type=datetime.date.fromisoformat)
+    parser.add_argument("end", type=datetime.date.fromisoformat)
+    parser.add_argument(
+        "--verbose", action="store_true", help="also list skipped days on stderr"
+    )
+    args = parser.parse_args(argv)
+
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    calendar = get_calendar()
+    day = args.start
+    while day <= args.end:
+        if calendar.is_workday(day):
+            print(day.isoformat())
+        elif args.verbose:
+            reason = calendar.reason(day)
+            print(f"Skipping {day.isoformat()}: {reason}", file=sys.stderr)
+        day += timedelta(days=1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""Single `toolbox` entry point for the scripts of this repository.
+
+Each subcommand imports its tool module only when it runs, so `toolbox --help`
+never pays for requests, googleapiclient, PyPDF2 or selenium. Arguments after
+the subcommand are handed to the tool's own main(), e.g.
+`toolbox clean-docs --help`.
+"""
+
+import sys
+import argparse
+import importlib
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+
+# name -> (directory, module, help)
+SUBCOMMANDS = {
+    "clockify": ("timerz", "clockify", "manage Clockify time entries"),
+    "clockify-reports": (
+        "timerz",
+        "clockify_reports",
+        "export Clockify entries to Parquet/CSV and aggregate them",
+    ),
+    "calendar-sync": (
+        "timerz",
+        "calendar_sync",
+        "create Clockify entries for Google Calendar meetings",
+    ),
+    "calendar": (
+        "google_calendar",
+        "add_google_event",
+        "add recurring events from a JSON file to Google Calendar",
+    ),
+    "pdf-merge": ("pdf", "concat_pdf", "merge every PDF of a folder"),
+    "pdf-split": ("pdf", "split_pdf", "extract or split PDF pages"),
+    "pdf-optimize": (
+        "pdf",
+        "optimize_pdf",
+        "recompress, deduplicate and downsample a PDF",
+    ),
+    "pdf-watermark": (
+        "pdf",
+        "filigrane_gouv",
+        "watermark a PDF with filigrane.beta.gouv.fr",
+    ),
+    "clean-docs": (
+        "specific_cleaner",
+        "doc_cleaner",
+        "remove document, code and UUID-named files",
+    ),
+    "organize-dates": (
+        "specific_cleaner",
+        "date_organizer",
+        "move files into YYYY-MM folders",
+    ),
+    "extensions": (
+        "specific_cleaner",
+        "extension_analyzer",
+        "statistics per file extension",
+    ),
+    "duplicates": ("specific_cleaner", "duplicate_finder", "find duplicate files"),
+    "undo": ("specific_cleaner", "op_journal", "undo a journaled cleaner run"),
+    "reverse": (
+        "misc",
+        "reverse_letters",
+        "reverse text or huge files by grapheme cluster",
+    ),
+    "bench": (
+        "specific_cleaner",
+        "benchmark",
+        "benchmark the cleaners on synthetic trees",
+    ),
+}
+
+
+def run_subcommand(name: str, argv: list[str]) -> None:
+    directory, module_name, _ = SUBCOMMANDS[name]
+    # Tools import their siblings by module name, as when run as scripts
+    sys.path.insert(0, str(ROOT / directory))
+    sys.argv[0] = f"toolbox {name}"
+    module = importlib.import_module(module_name)
+    module.main(argv)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="toolbox",
+        description="Collection of tools",
+        epilog="Run `toolbox <command> --help` for the options of a command.",
+    )
+    subparsers = parser.add_subparsers(dest="command", metavar="<command>")
+    for name, (_, _, help_text) in SUBCOMMANDS.items():
+        subparsers.add_parser(name, help=help_text, add_help=False)
+    return parser
+
+
+def main(argv: list[str] | None = None) -> None:
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] in SUBCOMMANDS:
+        run_subcommand(argv[0], argv[1:])
+        return
+
+    parser = build_parser()
+    parser.parse_args(argv)
+    parser.print_help()
+    sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()